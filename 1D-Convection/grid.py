@@ -14,31 +14,57 @@ from problem import Problem
 
 
 class Grid(Problem):
-    def __init__(self, domain: list, dx: float, dt: float, a=1, case=1) -> None:
-        super().__init__(domain, a, case)
+    def __init__(
+        self, domain: list, dx: float, dt: float, a=1, case=1, periodic=False
+    ) -> None:
+        super().__init__(domain, a, case, periodic)
         self.dx = dx
         self.dt = dt
 
-        self.nx = int((self.x_max - self.x_min) / dx)
-        self.nt = int((self.t_end - self.t_begin) / dt)
+        # nodes dx and dt apart, the schemes assume exactly these steps;
+        # periodic: x_max is the image of x_min and not a node
+        n = int(round((self.x_max - self.x_min) / dx))
+        self.nx = n if periodic else n + 1
+        self.nt = int(round((self.t_end - self.t_begin) / dt)) + 1
 
-        self.x = np.linspace(self.x_min, self.x_max, self.nx)
+        self.x = np.linspace(self.x_min, self.x_max, self.nx, endpoint=not periodic)
         self.t = np.linspace(self.t_begin, self.t_end, self.nt)
 
-        self.T, self.X = np.meshgrid(self.t, self.x)
+        # sparse (broadcasting) mesh, X is (nx, 1) and T is (1, nt)
+        self.T, self.X = np.meshgrid(self.t, self.x, sparse=True)
 
-    def bc_ic(self, u_num: np.ndarray) -> np.ndarray:
-        u_num[:, 0] = self.IC(self.x)
+    def level(self, n: int, t=None) -> np.ndarray:
+        """
+        time level n (at time t, by default t[n]) holding the boundary
+        values, and the IC for n = 0; periodic levels have no boundary
+        """
+        u = np.zeros((self.nx, *self.members))
+        if n == 0:
+            u[:] = self.IC(self.x[:, None] if self.members else self.x)
+        if self.periodic:
+            return u
 
-        u_num[0, :] = self.bc0(self.t)
-        u_num[self.nx - 1, :] = self.bc1(self.t)
-        return u_num
+        t = self.t[n : n + 1] if t is None else np.array([t])
+        u[:1] = self.solution(self.x[0], t)
+        u[-1:] = self.solution(self.x[-1], t)
+        return u
+
+    def ghosts(self, t: float, g: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        the exact solution on g nodes beyond either end at time t
+        """
+        j = np.arange(g, 0, -1)
+        x = np.concatenate([self.x[0] - j * self.dx, self.x[-1] + j[::-1] * self.dx])
+        u = self.solution(x[:, None] if self.members else x, t)
+        u = np.broadcast_to(u, (2 * g, *self.members))
+        return u[:g], u[g:]
 
     def plot_grid(self) -> None:
+        X, T = np.broadcast_arrays(self.X, self.T)
         ax = plt.subplot()
-        ax.scatter(self.X[1:-1], self.T[1:-1], marker="*")
-        ax.scatter(self.X[[0, -1], :], self.T[[0, -1], :], marker="^", label="BC")
-        ax.scatter(self.X[:, 0], self.T[:, 0], label="IC")
+        ax.scatter(X[1:-1], T[1:-1], marker="*")
+        ax.scatter(X[[0, -1], :], T[[0, -1], :], marker="^", label="BC")
+        ax.scatter(X[:, 0], T[:, 0], label="IC")
 
         ax.set_xlabel(r"x")
         ax.set_ylabel(r"t")
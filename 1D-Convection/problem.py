@@ -13,16 +13,31 @@ import matplotlib.pyplot as plt
 
 class Problem:
     """
-    u_t + a*u_x = 0
+    u_t + a*u_x = 0, Dirichlet or periodic on [x_min, x_max)
     """
 
-    def __init__(self, domain: list, a=1, case=1) -> None:
+    def __init__(self, domain: list, a=1, case=1, periodic=False) -> None:
         self.x_min, self.x_max, self.t_begin, self.t_end = domain
-        self.a = a
-        self.case = case
+        self.periodic = periodic
+        # a vector of speeds and/or cases is an ensemble, the members run
+        # along the last axis of u
+        self.a = np.asarray(a) if np.ndim(a) else a
+        self.case = np.asarray(case) if np.ndim(case) else case
+        self.members = np.broadcast_shapes(np.shape(a), np.shape(case))
 
     def IC(self, x: np.ndarray) -> np.ndarray | int:
-        match self.case:
+        if not np.ndim(self.case):
+            return self.__IC(x, self.case)
+
+        x = np.broadcast_to(x, np.broadcast_shapes(np.shape(x), self.case.shape))
+        ic = np.empty(x.shape)
+        for case in np.unique(self.case):
+            k = self.case == case
+            ic[..., k] = self.__IC(x[..., k], case)
+        return ic
+
+    def __IC(self, x: np.ndarray, case: int) -> np.ndarray | int:
+        match case:
             case 1:
                 ic = np.exp(-160 * (x - 1.5) ** 2)
                 ic[np.where((x >= 0.25) & (x <= 0.75))] = 1
@@ -44,6 +59,9 @@ class Problem:
                 return 0
 
     def solution(self, x: np.ndarray, t: np.ndarray) -> np.ndarray:
+        if self.periodic:
+            L = self.x_max - self.x_min
+            return self.IC(self.x_min + np.mod(x - self.a * t - self.x_min, L))
         return self.IC(x - self.a * t)
 
     def bc0(self, t: np.ndarray) -> np.ndarray:
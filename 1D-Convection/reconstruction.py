@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+#      "
+#    '':''
+#   ___:____      |\/|
+# ,'        `.    \  /
+# |  O        \___/  |
+# ~^~^~^~^~^~^~^~^~^~^
+
+"""
+Flux limiters and the WENO5 reconstruction used by the high resolution
+schemes, all acting on whole arrays.
+
+A limiter maps the ratio r of consecutive differences to phi(r) with
+phi(1) = 1 (Lax-Wendroff on smooth data) and phi(r <= 0) = 0 (UpWind at
+extrema), inside the Sweby TVD region.
+"""
+
+import numpy as np
+
+
+def minmod(r: np.ndarray) -> np.ndarray:
+    return np.maximum(0, np.minimum(1, r))
+
+
+def van_leer(r: np.ndarray) -> np.ndarray:
+    return (r + np.abs(r)) / (1 + np.abs(r))
+
+
+def superbee(r: np.ndarray) -> np.ndarray:
+    return np.maximum.reduce([np.zeros_like(r), np.minimum(2 * r, 1), np.minimum(r, 2)])
+
+
+def ratio(dm: np.ndarray, dp: np.ndarray) -> np.ndarray:
+    """
+    dm / dp, 0 where dp = 0 (the limited term phi(r) * dp vanishes anyway)
+    """
+    return np.divide(dm, dp, out=np.zeros(np.broadcast(dm, dp).shape), where=dp != 0)
+
+
+def weno5(
+    v0: np.ndarray, v1: np.ndarray, v2: np.ndarray, v3: np.ndarray, v4: np.ndarray
+) -> np.ndarray:
+    """
+    fifth order WENO (Jiang-Shu) value at the face between v2 and v3 from
+    the upwind side, v0..v4 the five values ordered in the flow direction
+    """
+    q = [
+        (2 * v0 - 7 * v1 + 11 * v2) / 6,
+        (-v1 + 5 * v2 + 2 * v3) / 6,
+        (2 * v2 + 5 * v3 - v4) / 6,
+    ]
+    beta = [
+        13 / 12 * (v0 - 2 * v1 + v2) ** 2 + 1 / 4 * (v0 - 4 * v1 + 3 * v2) ** 2,
+        13 / 12 * (v1 - 2 * v2 + v3) ** 2 + 1 / 4 * (v1 - v3) ** 2,
+        13 / 12 * (v2 - 2 * v3 + v4) ** 2 + 1 / 4 * (3 * v2 - 4 * v3 + v4) ** 2,
+    ]
+    alpha = [d / (1e-6 + b) ** 2 for d, b in zip((0.1, 0.6, 0.3), beta)]
+    return sum(a * qk for a, qk in zip(alpha, q)) / sum(alpha)
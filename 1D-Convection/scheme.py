@@ -7,112 +7,258 @@
 # |  O        \___/  |
 # ~^~^~^~^~^~^~^~^~^~^
 
+from functools import partial
 import numpy as np
+from scipy.signal import lfilter
 
 from grid import Grid
+from reconstruction import minmod, van_leer, superbee, ratio, weno5
 
 
 class Scheme(Grid):
-    def __init__(self, domain: list, dx: float, dt: float, a=1, case=1):
-        super().__init__(domain, dx, dt, a, case)
+    def __init__(self, domain: list, dx: float, dt: float, a=1, case=1, periodic=False):
+        super().__init__(domain, dx, dt, a, case, periodic)
         self.nu = dt / dx
 
     def solve(self, scheme: str) -> np.ndarray:
+        u_num = np.zeros((self.nx, self.nt, *self.members))
+        for n, u in self.stream(scheme):
+            u_num[:, n] = u
+        return u_num
+
+    def stream(self, scheme: str, stride=1):
+        """
+        yield (n, u[:, n]) every stride time levels, only the last two
+        levels are kept in memory
+        """
+        if scheme == "spectral":
+            for n in range(0, self.nt, stride):
+                yield n, self.spectral(self.t[n])
+            return
+
+        step = self.__step(scheme)
+        u1, u2 = self.level(0), None
+        yield 0, u1
+        for n in range(1, self.nt):
+            u = self.level(n)
+            self.time = self.t[n - 1]
+            step(u, u1, u2)
+            u1, u2 = u, u1
+            if n % stride == 0:
+                yield n, u
+
+    def march(self, scheme: str, times: np.ndarray, cfl=0.9) -> np.ndarray:
+        """
+        the levels at the output times (stacked on axis 1), every interval in
+        the fewest equal steps with max|a| dt / dx <= cfl; self.steps counts
+        them. The explicit schemes are stable up to |a| dt / dx = 1; the
+        implicit in space Wendroff and Carlson, for a > 0 only, for any dt
+        but 1 keeps them accurate (the Wendroff box scheme is then an exact
+        shift)
+        """
+        step = self.__step(scheme)
+        dt_max = cfl * self.dx / np.max(np.abs(self.a))
+
+        nu, t, dt = self.nu, self.t_begin, None
+        u1, u2 = self.level(0), None
+        out = []
+        self.steps = 0
+        try:
+            for T in times:
+                n = max(int(np.ceil((T - t) / dt_max)), 1) if T > t else 0
+                if n and (T - t) / n != dt:
+                    # LeapFrog restarts from one UpWind step after a change
+                    dt, u2 = (T - t) / n, None
+                    self.nu = dt / self.dx
+                for k in range(1, n + 1):
+                    u = self.level(1, T if k == n else t + k * dt)
+                    self.time = t + (k - 1) * dt
+                    step(u, u1, u2)
+                    u1, u2 = u, u1
+                t = T
+                self.steps += n
+                out.append(u1)
+        finally:
+            self.nu = nu
+        return np.stack(out, axis=1)
+
+    def __step(self, scheme: str):
         match scheme:
             case "UpWind":
-                return self.__UpWind()
+                step = self.__UpWind
             case "LaxWendroff":
-                return self.__LaxWendroff()
+                step = self.__LaxWendroff
             case "Wendroff":
-                return self.__Wendroff()
+                step = self.__Wendroff
             case "LeapFrog":
-                return self.__LeapFrog()
+                step = self.__LeapFrog
             case "LaxFriedrichs":
-                return self.__LaxFriedrichs()
+                step = self.__LaxFriedrichs
             case "Carlson":
-                return self.__Carlson()
+                step = self.__Carlson
+            case "MinMod":
+                step = partial(self.__TVD, phi=minmod)
+            case "VanLeer":
+                step = partial(self.__TVD, phi=van_leer)
+            case "SuperBee":
+                step = partial(self.__TVD, phi=superbee)
+            case "WENO5":
+                step = self.__WENO5
             case _:
                 print(f"{scheme} not define")
                 exit()
 
-    def __UpWind(self) -> np.ndarray:
-        u_num = np.zeros((self.nx, self.nt))
-        u_num = self.bc_ic(u_num)
-        k = 0 if self.a > 0 else 1
-        for n in range(1, self.nt):
-            for i in range(1, self.nx - 1):
-                u_num[i, n] = u_num[i, n - 1] - self.nu * self.a * (
-                    u_num[i + k, n - 1] - u_num[i + k - 1, n - 1]
-                )
+        if not self.periodic:
+            return step
+        if scheme in ("Wendroff", "Carlson"):
+            print(f"{scheme} needs Dirichlet boundaries")
+            exit()
+        return partial(self.__periodic, step=step)
 
-        return u_num
+    def __periodic(self, u: np.ndarray, u1: np.ndarray, u2: np.ndarray, step) -> None:
+        """
+        one step on the levels extended by the image of the last node on the
+        left and of the first on the right, the interior update then covers
+        every node
+        """
 
-    def __LaxWendroff(self) -> np.ndarray:
-        u_num = np.zeros((self.nx, self.nt))
-        u_num = self.bc_ic(u_num)
-        for n in range(1, self.nt):
-            for i in range(1, self.nx - 1):
-                u_num[i, n] = (
-                    u_num[i, n - 1]
-                    - 0.5
-                    * self.nu
-                    * self.a
-                    * (u_num[i + 1, n - 1] - u_num[i - 1, n - 1])
-                    + 0.5
-                    * self.nu**2
-                    * self.a**2
-                    * (u_num[i + 1, n - 1] - 2 * u_num[i, n - 1] + u_num[i - 1, n - 1])
-                )
+        def wrap(w):
+            return None if w is None else np.concatenate([w[-1:], w, w[:1]])
 
-        return u_num
+        e = wrap(u)
+        step(e, wrap(u1), wrap(u2))
+        u[:] = e[1:-1]
 
-    def __LeapFrog(self) -> np.ndarray:
-        u_num = np.zeros((self.nx, self.nt))
-        u_num = self.bc_ic(u_num)
-        k = 0 if self.a > 0 else 1
-        for i in range(1, self.nx - 1):
-            u_num[i, 1] = u_num[i, 0] - self.nu * self.a * (
-                u_num[i + k, 0] - u_num[i + k - 1, 0]
-            )
-
-        for n in range(2, self.nt):
-            for i in range(1, self.nx - 1):
-                u_num[i, n] = u_num[i, n - 2] - self.a * self.nu * (
-                    u_num[i + 1, n - 1] - u_num[i - 1, n - 1]
-                )
+    def spectral(self, t: float | np.ndarray) -> np.ndarray:
+        """
+        periodic only: the trigonometric interpolant of the IC translated by
+        a*t, every Fourier mode times exp(-i k a t), at the times t (stacked
+        on axis 1 for an array) without time stepping
+        """
+        if not self.periodic:
+            print("spectral needs periodic boundaries")
+            exit()
+        t = np.asarray(t)
+        extra = (1,) * len(self.members)
 
-        return u_num
+        U = np.fft.rfft(self.level(0), axis=0)
+        k = 2 * np.pi * np.fft.rfftfreq(self.nx, (self.x_max - self.x_min) / self.nx)
+        kt = np.multiply.outer(k, t).reshape(k.shape + t.shape + extra)
+        U = U.reshape(U.shape[:1] + (1,) * t.ndim + U.shape[1:])
+        return np.fft.irfft(U * np.exp(-1j * kt * self.a), self.nx, axis=0)
 
-    def __Wendroff(self) -> np.ndarray:
-        u_num = np.zeros((self.nx, self.nt))
-        u_num = self.bc_ic(u_num)
-        for n in range(1, self.nt):
-            for i in range(1, self.nx):
-                u_num[i, n] = u_num[i - 1, n - 1] + (
-                    (1 - self.a * self.nu) / (1 + self.a * self.nu)
-                ) * (u_num[i, n - 1] - u_num[i - 1, n])
+    # one time step: u holds the boundary values of the new level, u1 and u2
+    # are the previous two levels (u2 is None on the first step); for an
+    # ensemble they carry the members on the last axis and a is a vector
 
-        return u_num
+    def __UpWind(self, u: np.ndarray, u1: np.ndarray, u2: np.ndarray) -> None:
+        du = np.where(self.a > 0, u1[1:-1] - u1[:-2], u1[2:] - u1[1:-1])
+        u[1:-1] = u1[1:-1] - self.nu * self.a * du
 
-    def __LaxFriedrichs(self) -> np.ndarray:
-        u_num = np.zeros((self.nx, self.nt))
-        u_num = self.bc_ic(u_num)
-        for n in range(1, self.nt):
-            for i in range(1, self.nx - 1):
-                u_num[i, n] = 0.5 * (
-                    u_num[i - 1, n - 1] + u_num[i + 1, n - 1]
-                ) - 0.5 * self.a * self.nu * (u_num[i + 1, n - 1] - u_num[i - 1, n - 1])
-        return u_num
+    def __LaxWendroff(self, u: np.ndarray, u1: np.ndarray, u2: np.ndarray) -> None:
+        u[1:-1] = (
+            u1[1:-1]
+            - 0.5 * self.nu * self.a * (u1[2:] - u1[:-2])
+            + 0.5 * self.nu**2 * self.a**2 * (u1[2:] - 2 * u1[1:-1] + u1[:-2])
+        )
 
-    def __Carlson(self) -> np.ndarray:
-        u_num = np.zeros((self.nx, self.nt))
-        u_num = self.bc_ic(u_num)
-        for n in range(1, self.nt):
-            for i in range(1, self.nx - 1):
-                u_num[i, n] = (1 / (1 + self.a * self.nu)) * (
-                    u_num[i, n - 1] + self.a * self.nu * u_num[i - 1, n]
+    def __LeapFrog(self, u: np.ndarray, u1: np.ndarray, u2: np.ndarray) -> None:
+        # UpWind start
+        if u2 is None:
+            return self.__UpWind(u, u1, u2)
+        u[1:-1] = u2[1:-1] - self.a * self.nu * (u1[2:] - u1[:-2])
+
+    def __Wendroff(self, u: np.ndarray, u1: np.ndarray, u2: np.ndarray) -> None:
+        # u[i, n] = u[i-1, n-1] + c * u[i, n-1] - c * u[i-1, n], a first order
+        # recurrence along x run as an IIR filter, u[0, n] enters as its state
+        c = (1 - self.a * self.nu) / (1 + self.a * self.nu)
+        u[1:] = self.__iir(-c, u1[:-1] + c * u1[1:], u[:1])
+
+    def __LaxFriedrichs(self, u: np.ndarray, u1: np.ndarray, u2: np.ndarray) -> None:
+        u[1:-1] = 0.5 * (u1[:-2] + u1[2:]) - 0.5 * self.a * self.nu * (u1[2:] - u1[:-2])
+
+    def __Carlson(self, u: np.ndarray, u1: np.ndarray, u2: np.ndarray) -> None:
+        # u[i, n] = g * u[i, n-1] + g * a * nu * u[i-1, n], see __Wendroff
+        g = 1 / (1 + self.a * self.nu)
+        c = g * self.a * self.nu
+        u[1:-1] = self.__iir(c, g * u1[1:-1], u[:1])
+
+    @staticmethod
+    def __iir(c, x: np.ndarray, y0: np.ndarray) -> np.ndarray:
+        """
+        y[i] = x[i] + c * y[i-1] along axis 0 from y[-1] = y0, one lfilter
+        per distinct c of an ensemble
+        """
+        if not np.ndim(c):
+            return lfilter([1], [1, -c], x, axis=0, zi=c * y0)[0]
+        c = np.broadcast_to(c, x.shape[1:])
+        y = np.empty_like(x)
+        for ck in np.unique(c):
+            k = c == ck
+            y[:, k] = lfilter([1], [1, -ck], x[:, k], axis=0, zi=ck * y0[:, k])[0]
+        return y
+
+    def __upwind(self, face) -> np.ndarray:
+        """
+        face(True) for a > 0, face(False) for a < 0, per member
+        """
+        forward = self.a > 0
+        if np.all(forward):
+            return face(True)
+        if not np.any(forward):
+            return face(False)
+        return np.where(forward, face(True), face(False))
+
+    def __pad(self, w: np.ndarray, t: float, g: int) -> np.ndarray:
+        if self.periodic:
+            # w holds the images at either end, see __periodic
+            w = w[1:-1]
+            return np.concatenate([w[-g - 1 :], w, w[: g + 1]])
+        left, right = self.ghosts(t, g)
+        return np.concatenate([left, w, right])
+
+    def __TVD(self, u: np.ndarray, u1: np.ndarray, u2: np.ndarray, phi) -> None:
+        # UpWind flux plus the Lax-Wendroff correction scaled by phi(r),
+        # r the upwind over the local difference
+        c = self.a * self.nu
+        d = np.diff(self.__pad(u1, self.time, 1), axis=0)
+        dp = d[1:-1]
+
+        def face(forward):
+            if forward:
+                return u1[:-1] + 0.5 * (1 - c) * phi(ratio(d[:-2], dp)) * dp
+            return u1[1:] - 0.5 * (1 + c) * phi(ratio(d[2:], dp)) * dp
+
+        F = self.__upwind(face)
+        u[1:-1] = u1[1:-1] - c * (F[1:] - F[:-1])
+
+    def __WENO5(self, u: np.ndarray, u1: np.ndarray, u2: np.ndarray) -> None:
+        # WENO5 face values, three stage SSP Runge-Kutta (Shu-Osher)
+        c = self.a * self.nu
+        n = len(u1)
+        t, dt = self.time, self.nu * self.dx
+
+        def L(w, t):
+            # -c (F_i+1/2 - F_i-1/2) on the interior, ghosts exact at t
+            v = self.__pad(w, t, 3)
+
+            def face(forward):
+                if forward:
+                    return weno5(
+                        v[1:n], v[2 : n + 1], v[3 : n + 2], v[4 : n + 3], v[5 : n + 4]
+                    )
+                return weno5(
+                    v[6 : n + 5], v[5 : n + 4], v[4 : n + 3], v[3 : n + 2], v[2 : n + 1]
                 )
-        return u_num
+
+            F = self.__upwind(face)
+            return -c * (F[1:] - F[:-1])
+
+        w1 = np.zeros_like(u) if self.periodic else self.level(1, t + dt)
+        w1[1:-1] = u1[1:-1] + L(u1, t)
+        w2 = np.zeros_like(u) if self.periodic else self.level(1, t + dt / 2)
+        w2[1:-1] = 0.75 * u1[1:-1] + 0.25 * (w1[1:-1] + L(w1, t + dt))
+        u[1:-1] = u1[1:-1] / 3 + 2 / 3 * (w2[1:-1] + L(w2, t + dt / 2))
 
 
 if __name__ == "__main__":
@@ -14,31 +14,67 @@ from problem import Problem
 
 
 class Grid(Problem):
-    def __init__(self, domain: list, dx: float, dt: float, a=1, case=1) -> None:
+    def __init__(
+        self, domain: list, dx: float, dt: float, a=1, case=1, tables=False
+    ) -> None:
         super().__init__(domain, a, case)
         self.dx = dx
         self.dt = dt
 
-        self.nx = int((self.x_max - self.x_min) / dx)
-        self.nt = int((self.t_end - self.t_begin) / dt)
+        # nodes dx and dt apart, the schemes assume exactly these steps
+        self.nx = int(round((self.x_max - self.x_min) / dx)) + 1
+        self.nt = int(round((self.t_end - self.t_begin) / dt)) + 1
 
         self.x = np.linspace(self.x_min, self.x_max, self.nx)
         self.t = np.linspace(self.t_begin, self.t_end, self.nt)
 
-        self.T, self.X = np.meshgrid(self.t, self.x)
+        # sparse (broadcasting) mesh, X is (nx, 1) and T is (1, nt)
+        self.T, self.X = np.meshgrid(self.t, self.x, sparse=True)
 
-    def bc_ic(self, u_num: np.ndarray) -> np.ndarray:
-        u_num[:, 0] = self.IC(self.x)
+        # f on the interior and the boundary values for every level, an
+        # (nx - 2, nt) table: only where memory allows
+        self.tables = tables
+        if tables:
+            self.F = np.broadcast_to(
+                self.f(self.x[1:-1, None], self.t), (self.nx - 2, self.nt)
+            ).copy()
+            self.G = np.array(
+                [np.broadcast_to(g(self.t), self.t.shape) for g in (self.bc0, self.bc1)]
+            )
 
-        u_num[0, :] = self.bc0(self.t)
-        u_num[self.nx - 1, :] = self.bc1(self.t)
-        return u_num
+    def source(self, n: int) -> np.ndarray:
+        """
+        f on the interior nodes at t[n]
+        """
+        if self.tables:
+            return self.F[:, n]
+        return self.f(self.x[1:-1], self.t[n])
+
+    def boundary(self, n: int) -> tuple:
+        """
+        the boundary values at t[n]
+        """
+        if self.tables:
+            return self.G[0, n], self.G[1, n]
+        return self.bc0(self.t[n]), self.bc1(self.t[n])
+
+    def level(self, n: int) -> np.ndarray:
+        """
+        time level n holding the boundary values, and the IC for n = 0
+        """
+        u = np.zeros(self.nx)
+        if n == 0:
+            u[:] = self.IC(self.x)
+
+        u[0], u[-1] = self.boundary(n)
+        return u
 
     def plot_grid(self) -> None:
+        X, T = np.broadcast_arrays(self.X, self.T)
         ax = plt.subplot()
-        ax.scatter(self.X[1:-1], self.T[1:-1], marker="*")
-        ax.scatter(self.X[[0, -1], :], self.T[[0, -1], :], marker="^", label="BC")
-        ax.scatter(self.X[:, 0], self.T[:, 0], label="IC")
+        ax.scatter(X[1:-1], T[1:-1], marker="*")
+        ax.scatter(X[[0, -1], :], T[[0, -1], :], marker="^", label="BC")
+        ax.scatter(X[:, 0], T[:, 0], label="IC")
 
         ax.set_xlabel(r"x")
         ax.set_ylabel(r"t")
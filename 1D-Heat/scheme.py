@@ -7,103 +7,316 @@
 # |  O        \___/  |
 # ~^~^~^~^~^~^~^~^~^~^
 
+from functools import partial
 import numpy as np
+from scipy.fft import dst, idst
+from scipy.integrate import BDF, Radau
+from scipy.linalg import solve_banded
+from scipy.sparse import diags
 
 from grid import Grid
 
 
 class Scheme(Grid):
-    def __init__(self, domain: list, dx: float, dt: float, a=1, case=1) -> None:
-        super().__init__(domain, dx, dt, a, case)
+    def __init__(
+        self, domain: list, dx: float, dt: float, a=1, case=1, tables=False
+    ) -> None:
+        super().__init__(domain, dx, dt, a, case, tables)
         self.mu = dt / dx**2
 
-    def solve(self, scheme: str) -> np.ndarray:
+    def solve(self, scheme: str, levels=1) -> np.ndarray:
+        if levels > 1:
+            return self.richardson(scheme, levels)
+        u_num = np.zeros((self.nx, self.nt))
+        for n, u in self.stream(scheme):
+            u_num[:, n] = u
+        return u_num
+
+    def stream(self, scheme: str, stride=1):
+        """
+        yield (n, u[:, n]) every stride time levels, only the last level is
+        kept in memory
+        """
+        if scheme == "exponential":
+            u = self.level(0)
+            yield 0, u
+            for n in range(stride, self.nt, stride):
+                u = self.__propagate(u, self.t[n - stride], self.t[n])
+                yield n, u
+            return
+
+        if scheme in ("BDF", "Radau"):
+            yield 0, self.level(0)
+            for n, u in zip(
+                range(stride, self.nt, stride),
+                self.__lines(scheme, self.t[stride::stride]),
+            ):
+                yield n, u
+            return
+
         match scheme:
             case "explicit":
-                return self.__full_explicit()
+                step = self.__full_explicit
             case "implicit":
-                return self.__full_implicit()
+                step = partial(self.__full_implicit, ab=self.operator(1))
             case "Crank-Nicolson":
-                return self.__rose()
+                step = partial(self.__rose, ab=self.operator(0.5))
             case "Douglas":
                 theta = 1 / 2 - (1 / (12 * self.mu * self.a))
-                return self.__rose(theta)
+                step = partial(self.__rose, ab=self.operator(theta), theta=theta)
+            case "RKL2":
+                # fewest stages with a * mu <= (s^2 + s - 2) / 8
+                s = np.sqrt(9 + 32 * self.a * self.mu)
+                self.stages = max(int(np.ceil((s - 1) / 2)), 2)
+                step = partial(self.__RKL2, s=self.stages)
             case _:
                 print("scheme is not define")
                 exit()
 
-    def __full_explicit(self) -> np.ndarray:
-        u_num = np.zeros((self.nx, self.nt))
-        u_num = self.bc_ic(u_num)
+        u1 = self.level(0)
+        yield 0, u1
         for n in range(1, self.nt):
-            for i in range(1, self.nx - 1):
-                xi, tn = self.x[i], self.t[n - 1]
+            u = self.level(n)
+            step(u, u1, n)
+            u1 = u
+            if n % stride == 0:
+                yield n, u
 
-                u_num[i, n] += (1 - 2 * self.a * self.mu) * u_num[i, n - 1]
-                u_num[i, n] += self.dt * self.f(xi, tn)
+    def richardson(self, scheme: str, levels=2) -> np.ndarray:
+        """
+        Romberg table of the solutions on (dx, dt), (dx/2, dt/4), ... at the
+        nodes of this grid, mu is kept so the O(dt + dx^2) error (f is taken
+        at one time level, also for Douglas) expands in even powers of dx;
+        self.error_estimate is the difference of the last two columns
+        """
+        domain = [self.x_min, self.x_max, self.t_begin, self.t_end]
 
-                u_num[i, n] += self.a * self.mu * (u_num[i - 1, n - 1])
-                u_num[i, n] += self.a * self.mu * (u_num[i + 1, n - 1])
+        T = []
+        for k in range(levels):
+            dx, dt = self.dx / 2**k, self.dt / 4**k
+            grid = (
+                self
+                if k == 0
+                else Scheme(domain, dx, dt, self.a, self.case, self.tables)
+            )
+            U = [u[:: 2**k] for _, u in grid.stream(scheme, 4**k)]
+            row = [np.stack(U, axis=-1)]
+            for j in range(1, k + 1):
+                row.append(row[-1] + (row[-1] - T[-1][j - 1]) / (4**j - 1))
+            T.append(row)
 
-        return u_num
+        self.error_estimate = np.abs(T[-1][-1] - T[-1][-2]) if levels > 1 else None
+        return T[-1][-1]
 
-    def __full_implicit(self) -> np.ndarray:
-        u_num = np.zeros((self.nx, self.nt))
-        u_num = self.bc_ic(u_num)
-        for n in range(1, self.nt):
-            A = np.zeros((self.nx - 2, self.nx - 2))
-            b = np.zeros(self.nx - 2)
-            for i in range(1, self.nx - 1):
-                xi, tn = self.x[i], self.t[n]
-                A[i - 1, i - 1] += 1 + 2 * self.a * self.mu
-                b[i - 1] += u_num[i, n - 1] + self.dt * self.f(xi, tn)
-
-                if i == 1:
-                    A[i - 1, i] += -self.a * self.mu
-                    b[i - 1] += self.a * self.mu * self.bc0(self.t[n])
-                elif i == self.nx - 2:
-                    A[i - 1, i - 2] += -self.a * self.mu
-                    b[i - 1] += self.a * self.mu * self.bc1(self.t[n])
-                else:
-                    A[i - 1, i] += -self.a * self.mu
-                    A[i - 1, i - 2] += -self.a * self.mu
-
-            u_n = np.linalg.solve(A, b)
-            u_num[1 : self.nx - 1, n] = u_n
+    def exponential(self, times: np.ndarray, m=8) -> np.ndarray:
+        """
+        the semi-discrete solution, exact in time up to the quadrature of f,
+        at the output times (stacked on axis 1); each output is propagated
+        from the previous one, no time steps in between
+        """
+        u, t = self.level(0), self.t_begin
+        out = []
+        for T in np.atleast_1d(times):
+            u, t = self.__propagate(u, t, T, m), T
+            out.append(u)
+        return np.stack(out, axis=1)
 
-        return u_num
+    def __propagate(self, u1: np.ndarray, t0: float, t1: float, m=8) -> np.ndarray:
+        """
+        u' = a D2 u + f, the Dirichlet data a forcing on the end nodes, from t0
+        to t1: the DST-I diagonalizes D2, Duhamel's integral takes the forcing
+        on m panels as quadratics (ends and midpoint) integrated exactly
+        against the exponential
+        """
+        if t1 == t0:
+            return u1.copy()
+        N = self.nx - 2
+        k = np.arange(1, N + 1)
+        r = self.a * (2 / self.dx * np.sin(np.pi * k / (2 * (N + 1)))) ** 2
 
-    def __rose(self, theta=0.5) -> np.ndarray:
-        u_num = np.zeros((self.nx, self.nt))
-        u_num = self.bc_ic(u_num)
-        for n in range(1, self.nt):
-            A = np.zeros((self.nx - 2, self.nx - 2))
-            b = np.zeros(self.nx - 2)
-            for i in range(1, self.nx - 1):
-                xi, tn = self.x[i], self.t[n]
-                A[i - 1, i - 1] += 1 + 2 * theta * self.a * self.mu
-                b[i - 1] += u_num[i, n - 1] + self.dt * self.f(xi, tn)
-                b[i - 1] += (
-                    (1 - theta)
-                    * self.a
-                    * self.mu
-                    * (u_num[i - 1, n - 1] - 2 * u_num[i, n - 1] + u_num[i + 1, n - 1])
-                )
-
-                if i == 1:
-                    A[i - 1, i] += -theta * self.a * self.mu
-                    b[i - 1] += theta * self.a * self.mu * self.bc0(self.t[n])
-                elif i == self.nx - 2:
-                    A[i - 1, i - 2] += -theta * self.a * self.mu
-                    b[i - 1] += theta * self.a * self.mu * self.bc1(self.t[n])
-                else:
-                    A[i - 1, i] += -theta * self.a * self.mu
-                    A[i - 1, i - 2] += -theta * self.a * self.mu
-
-            u_n = np.linalg.solve(A, b)
-            u_num[1 : self.nx - 1, n] = u_n
+        h = (t1 - t0) / m
+        s = t0 + h / 2 * np.arange(2 * m + 1)
+        q = np.broadcast_to(self.f(self.x[1:-1], s[:, None]), (2 * m + 1, N)).astype(
+            float
+        )
+        q[:, 0] += self.a / self.dx**2 * self.bc0(s)
+        q[:, -1] += self.a / self.dx**2 * self.bc1(s)
+        q = dst(q, type=1, axis=-1)
 
-        return u_num
+        b = self.__weights(r * h)
+        v = np.exp(-r * (t1 - t0)) * dst(u1[1:-1], type=1)
+        for i in range(m):
+            v += (
+                h
+                * np.exp(-r * h * (m - 1 - i))
+                * (b[0] * q[2 * i] + b[1] * q[2 * i + 1] + b[2] * q[2 * i + 2])
+            )
+
+        u = np.empty(self.nx)
+        u[0], u[-1] = self.bc0(t1), self.bc1(t1)
+        u[1:-1] = idst(v, type=1)
+        return u
+
+    @staticmethod
+    def __weights(x: np.ndarray) -> np.ndarray:
+        """
+        int_0^1 exp(-x (1 - s)) l_j(s) ds for the quadratic Lagrange basis on
+        s = 0, 1/2, 1; moments by series for small x, by recursion otherwise
+        """
+        M = np.zeros((3, len(x)))
+        small = x < 1
+        xs, xl = x[small], x[~small]
+        for j in range(3):
+            c = 1 / np.cumprod(np.arange(j + 1, j + 22))
+            M[j, small] = np.polynomial.polynomial.polyval(-xs, c)
+        M[0, ~small] = -np.expm1(-xl) / xl
+        M[1, ~small] = (1 - M[0, ~small]) / xl
+        M[2, ~small] = (1 - 2 * M[1, ~small]) / xl
+        return np.array(
+            [M[0] - 3 * M[1] + 2 * M[2], 4 * M[1] - 4 * M[2], 2 * M[2] - M[1]]
+        )
+
+    def lines(
+        self, times: np.ndarray, method="BDF", rtol=1e-6, atol=1e-9
+    ) -> np.ndarray:
+        """
+        the method of lines solution at the output times (stacked on axis 1)
+        by an adaptive stiff integrator, BDF or Radau; self.steps counts the
+        accepted steps
+        """
+        return np.stack(
+            list(self.__lines(method, np.atleast_1d(times), rtol, atol)), axis=1
+        )
+
+    def __lines(self, method: str, times: np.ndarray, rtol=1e-6, atol=1e-9):
+        """
+        u' = a D2 u + f with the Dirichlet data a forcing on the end nodes,
+        the sparse D2 is also the Jacobian; steps as far as the error control
+        allows and reads the output times off the dense output
+        """
+        N = self.nx - 2
+        c = self.a / self.dx**2
+        A = diags([c, -2 * c, c], [-1, 0, 1], shape=(N, N), format="csc")
+
+        def rhs(t, v):
+            dv = A @ v + self.f(self.x[1:-1], t)
+            dv[0] += c * self.bc0(t)
+            dv[-1] += c * self.bc1(t)
+            return dv
+
+        match method:
+            case "BDF":
+                integrator = BDF
+            case "Radau":
+                integrator = Radau
+            case _:
+                print(f"{method} not define")
+                exit()
+
+        integrator = integrator(
+            rhs,
+            self.t_begin,
+            self.level(0)[1:-1],
+            times[-1],
+            rtol=rtol,
+            atol=atol,
+            jac=A,
+        )
+        self.steps = 0
+        for t in times:
+            while integrator.t < t:
+                message = integrator.step()
+                if message is not None:
+                    print(message)
+                    exit()
+                self.steps += 1
+            u = np.empty(self.nx)
+            u[0], u[-1] = self.bc0(t), self.bc1(t)
+            u[1:-1] = integrator.dense_output()(t) if integrator.t > t else integrator.y
+            yield u
+
+    # one time step: u holds the boundary values of level n, u1 is level n-1
+
+    def __full_explicit(self, u: np.ndarray, u1: np.ndarray, n: int) -> None:
+        u[1:-1] = (
+            (1 - 2 * self.a * self.mu) * u1[1:-1]
+            + self.dt * self.source(n - 1)
+            + self.a * self.mu * u1[:-2]
+            + self.a * self.mu * u1[2:]
+        )
+
+    def operator(self, theta: float) -> np.ndarray:
+        """
+        I - theta * a * mu * D2 on the interior nodes, in the (1, 1) banded
+        form of solve_banded; assembled once per run
+        """
+        c = theta * self.a * self.mu
+        ab = np.zeros((3, self.nx - 2))
+        ab[0, 1:] = -c
+        ab[1] = 1 + 2 * c
+        ab[2, :-1] = -c
+        return ab
+
+    def __full_implicit(
+        self, u: np.ndarray, u1: np.ndarray, n: int, ab: np.ndarray
+    ) -> None:
+        g0, g1 = self.boundary(n)
+        b = u1[1:-1] + self.dt * self.source(n)
+        b[0] += self.a * self.mu * g0
+        b[-1] += self.a * self.mu * g1
+
+        u[1:-1] = solve_banded((1, 1), ab, b)
+
+    def __rose(
+        self, u: np.ndarray, u1: np.ndarray, n: int, ab: np.ndarray, theta=0.5
+    ) -> None:
+        g0, g1 = self.boundary(n)
+        b = u1[1:-1] + self.dt * self.source(n)
+        b += (1 - theta) * self.a * self.mu * (u1[:-2] - 2 * u1[1:-1] + u1[2:])
+        b[0] += theta * self.a * self.mu * g0
+        b[-1] += theta * self.a * self.mu * g1
+
+        u[1:-1] = solve_banded((1, 1), ab, b)
+
+    def __RKL2(self, u: np.ndarray, u1: np.ndarray, n: int, s=2) -> None:
+        """
+        Runge-Kutta-Legendre super time step (Meyer, Balsara and Aslam 2014),
+        s stages of the explicit operator, second order, stable for
+        a * mu <= (s^2 + s - 2) / 8; the stages take f and the boundary
+        values at their own times
+        """
+        t, am = self.t[n - 1], self.a * self.mu
+        w1 = 4 / (s**2 + s - 2)
+        b = [1 / 3, 1 / 3] + [
+            (j**2 + j - 2) / (2 * j * (j + 1)) for j in range(2, s + 1)
+        ]
+
+        def L(y, c):
+            f = self.f(self.x[1:-1], t + c * self.dt)
+            return am * (y[:-2] - 2 * y[1:-1] + y[2:]) + self.dt * f
+
+        L0 = am * (u1[:-2] - 2 * u1[1:-1] + u1[2:]) + self.dt * self.source(n - 1)
+        y2, y1 = u1, u1.copy()
+        c2, c1 = 0, b[1] * w1
+        y1[1:-1] += c1 * L0
+        y1[0], y1[-1] = self.bc0(t + c1 * self.dt), self.bc1(t + c1 * self.dt)
+        for j in range(2, s + 1):
+            mu = (2 * j - 1) / j * b[j] / b[j - 1]
+            nu = -(j - 1) / j * b[j] / b[j - 2]
+            gamma = -(1 - b[j - 1]) * mu * w1
+
+            y = u if j == s else np.empty(self.nx)
+            y[1:-1] = (
+                mu * y1[1:-1]
+                + nu * y2[1:-1]
+                + (1 - mu - nu) * u1[1:-1]
+                + mu * w1 * L(y1, c1)
+                + gamma * L0
+            )
+            c = mu * c1 + nu * c2 + mu * w1 + gamma
+            if j < s:
+                y[0], y[-1] = self.bc0(t + c * self.dt), self.bc1(t + c * self.dt)
+            y2, y1, c2, c1 = y1, y, c1, c
 
 
 if __name__ == "__main__":
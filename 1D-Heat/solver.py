@@ -8,6 +8,10 @@
 # ~^~^~^~^~^~^~^~^~^~^
 
 import argparse
+import time
+import multiprocessing as mp
+from multiprocessing.shared_memory import SharedMemory
+from itertools import islice
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
@@ -15,39 +19,115 @@ import matplotlib.animation as animation
 from scheme import Scheme
 
 
-def compare(solver: Scheme, scheme: list) -> dict:
-    X, T = solver.X, solver.T
-    u_ref = solver.solution(X, T)
-
-    fig = plt.figure(layout="constrained")
-    ax = fig.add_subplot()
-    (line1,) = ax.plot(solver.x, u_ref[:, 0], linestyle="-", label="Reference")
-
-    u_num = {sch: solver.solve(sch) for sch in scheme}
-    lines = {
-        sch: ax.plot(solver.x, u_num[sch][:, 10], linestyle="-.", label=f"{sch}")[0]
-        for sch in scheme
-    }
-
-    ax.set_title(rf"$\nu$={solver.mu} t=0")
-    ax.legend(loc="upper right")
-
-    def update(frame):
-        line1.set_ydata(u_ref[:, frame])
-        updated_line = [
-            line.set_ydata(u_num[sch][:, frame]) for sch, line in lines.items()
-        ]
-        ax.set_title(rf"$\mu$={solver.mu:.3f} t={solver.dt*frame:.3f}")
-
-        return updated_line.append(line1)
-
-    ani = animation.FuncAnimation(
-        fig, update, frames=solver.nt, interval=20, repeat=False
-    )
-
-    plt.show()
-
-    return u_num
+def produce(
+    solver: Scheme,
+    scheme: str,
+    levels: int,
+    stride: int,
+    name: str,
+    size: int,
+    ready,
+    drawn,
+) -> None:
+    """
+    worker: one scheme into the ring of size frames in the shared block name,
+    ready counts the frames written and drawn the frames plotted so far; the
+    extrapolated solution needs the finer grids first
+    """
+    if levels == 1:
+        frames = solver.stream(scheme, stride)
+    else:
+        frames = islice(enumerate(solver.solve(scheme, levels).T), 0, None, stride)
+
+    shm = SharedMemory(name=name)
+    out = np.ndarray((size, *solver.level(0).shape), buffer=shm.buf)
+    for k, (_, u) in enumerate(frames):
+        # ring buffer: wait until the slot of frame k - size has been drawn
+        while k - drawn.value >= size:
+            time.sleep(1e-3)
+        out[k % size] = u
+        ready.value = k + 1
+    del out
+    shm.close()
+
+
+def compare(solver: Scheme, scheme: list, levels=1, stride=1, size=8) -> None:
+    # every scheme runs in its own process and returns its levels through a
+    # shared ring of size frames, a frame is drawn once all schemes have
+    # reached it and a worker waits while its ring is full
+    count = len(range(0, solver.nt, stride))
+    size = max(1, min(size, count))
+    shape = (size, *solver.level(0).shape)
+    nbytes = int(np.prod(shape)) * np.dtype(float).itemsize
+    shms = [SharedMemory(create=True, size=nbytes) for _ in scheme]
+    ready = [mp.Value("l", 0, lock=False) for _ in scheme]
+    drawn = mp.Value("l", 0, lock=False)
+    workers = [
+        mp.Process(
+            target=produce, args=(solver, sch, levels, stride, shm.name, size, r, drawn)
+        )
+        for sch, shm, r in zip(scheme, shms, ready)
+    ]
+    for p in workers:
+        p.start()
+    outs = [np.ndarray(shape, buffer=shm.buf) for shm in shms]
+
+    def frames():
+        for k in range(count):
+            for sch, p, r in zip(scheme, workers, ready):
+                while r.value <= k:
+                    if p.exitcode is not None and r.value <= k:
+                        print(f"{sch} stopped at frame {k}")
+                        return
+                    time.sleep(1e-3)
+            # copy the slots out before handing them back to the workers
+            frame = [(k * stride, out[k % size].copy()) for out in outs]
+            drawn.value = k + 1
+            yield frame
+
+    gen = frames()
+    try:
+        fig = plt.figure(layout="constrained")
+        ax = fig.add_subplot()
+        u0 = solver.level(0)
+        (line1,) = ax.plot(solver.x, u0, linestyle="-", label="Reference")
+        lines = {
+            sch: ax.plot(solver.x, u0, linestyle="-.", label=f"{sch}")[0]
+            for sch in scheme
+        }
+
+        ax.set_title(rf"$\mu$={solver.mu:.3f} t=0")
+        ax.legend(loc="upper right")
+
+        def update(frame):
+            n = frame[0][0]
+            line1.set_ydata(solver.solution(solver.x, solver.t[n]))
+            for (_, u), line in zip(frame, lines.values()):
+                line.set_ydata(u)
+            ax.set_title(rf"$\mu$={solver.mu:.3f} t={solver.t[n]:.3f}")
+
+            return [line1, *lines.values()]
+
+        ani = animation.FuncAnimation(
+            fig,
+            update,
+            frames=gen,
+            interval=20,
+            repeat=False,
+            cache_frame_data=False,
+            save_count=solver.nt // stride,
+        )
+
+        plt.show()
+    finally:
+        for p in workers:
+            p.terminate()
+            p.join()
+        gen.close()
+        del outs
+        for shm in shms:
+            shm.close()
+            shm.unlink()
 
 
 if __name__ == "__main__":
@@ -61,7 +141,14 @@ if __name__ == "__main__":
         "--scheme",
         nargs="*",
         default=["implicit"],
-        help="explicit implicit Crank-Nicolson Douglas",
+        help="explicit implicit Crank-Nicolson Douglas RKL2 exponential BDF Radau",
+    )
+    parser.add_argument(
+        "--levels", type=int, default=1, help="Richardson extrapolation levels"
+    )
+    parser.add_argument("--stride", type=int, default=1, help="time steps per frame")
+    parser.add_argument(
+        "--tables", type=int, default=0, help="0 or 1, precompute f and the BC"
     )
     args = parser.parse_args()
 
@@ -69,7 +156,7 @@ if __name__ == "__main__":
 
     # solver
     scheme = args.scheme
-    solver = Scheme(domain, args.dx, args.dt, args.a, args.case)
+    solver = Scheme(domain, args.dx, args.dt, args.a, args.case, bool(args.tables))
 
     # plot
-    u_num = compare(solver, args.scheme)
+    compare(solver, args.scheme, args.levels, args.stride)
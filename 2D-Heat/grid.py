@@ -14,37 +14,55 @@ from problem import Problem
 
 
 class Grid(Problem):
-    def __init__(self, domain: list, dx: float, dy: float, dt: float, a=1, b=1, case=1):
-        super().__init__(domain, a, b, case)
+    def __init__(
+        self,
+        domain: list,
+        dx: float,
+        dy: float,
+        dt: float,
+        a=1,
+        b=1,
+        case=1,
+        periodic=False,
+    ):
+        super().__init__(domain, a, b, case, periodic)
         self.dx = dx
         self.dy = dy
         self.dt = dt
 
-        self.nx = int((self.x_max - self.x_min) / dx)
-        self.ny = int((self.y_max - self.y_min) / dy)
-        self.nt = int((self.t1 - self.t0) / dt)
+        # nodes dx, dy and dt apart, the schemes assume exactly these steps;
+        # periodic: x_max and y_max are images of x_min and y_min, not nodes
+        nx = int(round((self.x_max - self.x_min) / dx))
+        ny = int(round((self.y_max - self.y_min) / dy))
+        self.nx = nx if periodic else nx + 1
+        self.ny = ny if periodic else ny + 1
+        self.nt = int(round((self.t1 - self.t0) / dt)) + 1
 
-        self.x = np.linspace(self.x_min, self.x_max, self.nx)
-        self.y = np.linspace(self.y_min, self.y_max, self.ny)
+        self.x = np.linspace(self.x_min, self.x_max, self.nx, endpoint=not periodic)
+        self.y = np.linspace(self.y_min, self.y_max, self.ny, endpoint=not periodic)
         self.t = np.linspace(self.t0, self.t1, self.nt)
 
-    def u_bc_ic(self, u_num):
-        T, Y = np.meshgrid(self.t, self.y)
-        u_num[0, :, :] = self.bc_x0(Y, T)
-        u_num[-1, :, :] = self.bc_x1(Y, T)
+    def level(self, n, t=None):
+        """
+        time level n (at time t, by default t[n]) holding the boundary
+        values, and the IC for n = 0; periodic levels have no boundary
+        """
+        u = np.zeros((self.nx, self.ny))
+        t = self.t[n] if t is None else t
+        if not self.periodic:
+            for i in (0, -1):
+                u[i, :] = self.solution(self.x[i], self.y, np.full(self.ny, t))
+            for j in (0, -1):
+                u[:, j] = self.solution(self.x, self.y[j], np.full(self.nx, t))
 
-        T, X = np.meshgrid(self.t, self.x)
-        u_num[:, 0, :] = self.bc_y0(X, T)
-        u_num[:, -1, :] = self.bc_y1(X, T)
+        if n == 0:
+            Y, X = np.meshgrid(self.y, self.x)
+            u[:, :] = self.ic(X, Y)
 
-        Y, X = np.meshgrid(self.y, self.x)
-        u_num[:, :, 0] = self.ic(X, Y)
-
-        return u_num
+        return u
 
 
 if __name__ == "__main__":
     domain = [0, 2, 0, 2, 0, 1]
     grid = Grid(domain, 0.01, 0.01, 0.01)
-    u_num = np.zeros((grid.nx, grid.ny, grid.nt))
-    print(grid.u_bc_ic(u_num))
+    print(grid.level(0))
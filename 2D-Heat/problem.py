@@ -13,11 +13,12 @@ import matplotlib.pyplot as plt
 
 class Problem:
     """
-    u_t + au_x + bu_y = 0
+    u_t + au_x + bu_y = 0, Dirichlet or periodic in x and y
     """
 
-    def __init__(self, domain: list, a=1, b=1, case=1):
+    def __init__(self, domain: list, a=1, b=1, case=1, periodic=False):
         self.x_min, self.x_max, self.y_min, self.y_max, self.t0, self.t1 = domain
+        self.periodic = periodic
         self.case = case
         self.a = a
         self.b = b
@@ -28,11 +29,17 @@ class Problem:
                 ic = np.ones_like(x)
                 ic[(x >= 0.5) & (y >= 0.5)] = 0
                 return ic
+            case 2:
+                return np.sin(2 * np.pi * x) * np.cos(2 * np.pi * y)
             case _:
                 return 0
 
     def solution(self, x, y, t):
-        return self.ic(x - self.a * t, y - self.b * t)
+        x, y = x - self.a * t, y - self.b * t
+        if self.periodic:
+            x = self.x_min + np.mod(x - self.x_min, self.x_max - self.x_min)
+            y = self.y_min + np.mod(y - self.y_min, self.y_max - self.y_min)
+        return self.ic(x, y)
 
     def bc_x0(self, y, t):
         return self.solution(self.x_min, y, t)
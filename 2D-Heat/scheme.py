@@ -14,32 +14,121 @@ from grid import Grid
 
 
 class Scheme(Grid):
-    def __init__(self, domain: list, dx: float, dy: float, dt: float, a=1, b=1, case=1):
-        super().__init__(domain, dx, dy, dt, a, b, case)
+    def __init__(
+        self,
+        domain: list,
+        dx: float,
+        dy: float,
+        dt: float,
+        a=1,
+        b=1,
+        case=1,
+        periodic=False,
+    ):
+        super().__init__(domain, dx, dy, dt, a, b, case, periodic)
 
         self.mu_x = self.dt / self.dx
         self.mu_y = self.dt / self.dy
 
     def solve(self, scheme: str):
+        u_num = np.zeros((self.nx, self.ny, self.nt))
+        for n, u in self.stream(scheme):
+            u_num[:, :, n] = u
+        return u_num
+
+    def stream(self, scheme: str, stride=1):
+        """
+        yield (n, u[:, :, n]) every stride time levels, only the last level
+        is kept in memory
+        """
+        if scheme == "spectral":
+            for n in range(0, self.nt, stride):
+                yield n, self.spectral(self.t[n])
+            return
+
         match scheme:
             case "UpWind":
-                return self.__UpWind()
-
-    def __UpWind(self):
-        u_num = np.zeros((self.nx, self.ny, self.nt))
-        u_num = self.u_bc_ic(u_num)
+                step = self.__UpWind
+            case _:
+                print(f"{scheme} not define")
+                exit()
 
+        u1 = self.level(0)
+        yield 0, u1
         for n in range(1, self.nt):
-            for j in range(1, self.nx - 1):
-                for k in range(1, self.ny - 1):
-                    u_num[j, k, n] = (
-                        u_num[j, k, n - 1]
-                        - self.a
-                        * self.mu_x
-                        * (u_num[j, k, n - 1] - u_num[j - 1, k, n - 1])
-                        - self.b
-                        * self.mu_y
-                        * (u_num[j, k, n - 1] - u_num[j, k - 1, n - 1])
-                    )
+            u = self.level(n)
+            step(u, u1)
+            u1 = u
+            if n % stride == 0:
+                yield n, u
 
-        return u_num
+    def march(self, scheme: str, times, cfl=0.9):
+        """
+        the levels at the output times (stacked on the last axis), every
+        interval in the fewest equal steps with |a| dt / dx + |b| dt / dy
+        <= cfl, the UpWind stability limit being 1; self.steps counts them
+        """
+        match scheme:
+            case "UpWind":
+                step = self.__UpWind
+            case _:
+                print(f"{scheme} not define")
+                exit()
+        dt_max = cfl / (abs(self.a) / self.dx + abs(self.b) / self.dy)
+
+        mu, t = (self.mu_x, self.mu_y), self.t0
+        u1 = self.level(0)
+        out = []
+        self.steps = 0
+        try:
+            for T in times:
+                n = max(int(np.ceil((T - t) / dt_max)), 1) if T > t else 0
+                if n:
+                    dt = (T - t) / n
+                    self.mu_x, self.mu_y = dt / self.dx, dt / self.dy
+                for k in range(1, n + 1):
+                    u = self.level(1, T if k == n else t + k * dt)
+                    step(u, u1)
+                    u1 = u
+                t = T
+                self.steps += n
+                out.append(u1)
+        finally:
+            self.mu_x, self.mu_y = mu
+        return np.stack(out, axis=-1)
+
+    def spectral(self, t):
+        """
+        periodic only: the trigonometric interpolant of the IC translated by
+        (a*t, b*t), every Fourier mode times exp(-i (a kx + b ky) t), at the
+        times t (stacked on the last axis for an array) without time stepping
+        """
+        if not self.periodic:
+            print("spectral needs periodic boundaries")
+            exit()
+        t = np.asarray(t)
+
+        U = np.fft.rfft2(self.level(0))
+        kx = 2 * np.pi * np.fft.fftfreq(self.nx, (self.x_max - self.x_min) / self.nx)
+        ky = 2 * np.pi * np.fft.rfftfreq(self.ny, (self.y_max - self.y_min) / self.ny)
+        w = self.a * kx[:, None] + self.b * ky[None, :]
+        shift = np.exp(-1j * np.multiply.outer(w, t))
+        U = U.reshape(U.shape + (1,) * t.ndim)
+        return np.fft.irfft2(U * shift, (self.nx, self.ny), axes=(0, 1))
+
+    def __UpWind(self, u, u1):
+        if self.periodic:
+            # every node, the upwind neighbours wrap around
+            u[:, :] = (
+                u1
+                - self.a * self.mu_x * (u1 - np.roll(u1, 1, axis=0))
+                - self.b * self.mu_y * (u1 - np.roll(u1, 1, axis=1))
+            )
+            return
+        for j in range(1, self.nx - 1):
+            for k in range(1, self.ny - 1):
+                u[j, k] = (
+                    u1[j, k]
+                    - self.a * self.mu_x * (u1[j, k] - u1[j - 1, k])
+                    - self.b * self.mu_y * (u1[j, k] - u1[j, k - 1])
+                )
@@ -14,7 +14,10 @@ from scheme import Scheme
 
 solver = Scheme([0, 1, 0, 1, 0, 1], 0.01, 0.01, 0.005)
 
-u_num = solver.solve("UpWind")
+# step only up to the level shown
+for n, u_num in solver.stream("UpWind", stride=50):
+    if n == 50:
+        break
 
 
 fig = plt.figure()
@@ -24,7 +27,7 @@ ax2 = fig.add_subplot(122)
 Y, X = np.meshgrid(solver.y, solver.x)
 
 co1 = ax1.contourf(X, Y, solver.solution(X, Y, 0.25))
-co2 = ax2.contourf(X, Y, u_num[:, :, 50])
+co2 = ax2.contourf(X, Y, u_num)
 fig.colorbar(co1)
 fig.colorbar(co2)
 
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+#      "
+#    '':''
+#   ___:____      |\/|
+# ,'        `.    \  /
+# |  O        \___/  |
+# ~^~^~^~^~^~^~^~^~^~^
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from problem import Problem
+
+
+class Grid(Problem):
+    def __init__(self, domain: list, h: float, case=1) -> None:
+        super().__init__(case)
+        self.h = h
+        self.x_min, self.x_max, self.y_min, self.y_max, self.z_min, self.z_max = domain
+        # nodes h apart, the stencils assume the spacing is exactly h
+        self.nx = int(round((self.x_max - self.x_min) / h)) + 1
+        self.ny = int(round((self.y_max - self.y_min) / h)) + 1
+        self.nz = int(round((self.z_max - self.z_min) / h)) + 1
+        self.shape = (self.nx, self.ny, self.nz)
+
+        self.x = np.linspace(self.x_min, self.x_max, self.nx)
+        self.y = np.linspace(self.y_min, self.y_max, self.ny)
+        self.z = np.linspace(self.z_min, self.z_max, self.nz)
+
+        # sparse (broadcasting) mesh, a full one costs three nx*ny*nz arrays
+        self.X, self.Y, self.Z = np.meshgrid(
+            self.x, self.y, self.z, indexing="ij", sparse=True
+        )
+
+    def idx(self, i, j, k):
+        return (i * self.ny + j) * self.nz + k
+
+    def boundary(self) -> np.ndarray:
+        mask = np.zeros(self.shape, dtype=bool)
+        mask[[0, -1], :, :] = True
+        mask[:, [0, -1], :] = True
+        mask[:, :, [0, -1]] = True
+        return mask
+
+    def plot_grid(self) -> None:
+        X, Y, Z = np.broadcast_arrays(self.X, self.Y, self.Z)
+        bc = self.boundary()
+
+        ax = plt.figure().add_subplot(projection="3d")
+        ax.scatter(X[~bc], Y[~bc], Z[~bc], marker="*")
+        ax.scatter(X[bc], Y[bc], Z[bc], marker="^", label="BC")
+
+        ax.set_xlabel(r"x")
+        ax.set_ylabel(r"y")
+        ax.set_zlabel(r"z")
+
+        ax.legend()
+
+        plt.show()
+
+
+if __name__ == "__main__":
+    grid = Grid([0, 1, 0, 1, 0, 1], 0.2)
+    grid.plot_grid()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+#      "
+#    '':''
+#   ___:____      |\/|
+# ,'        `.    \  /
+# |  O        \___/  |
+# ~^~^~^~^~^~^~^~^~^~^
+
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+from scipy.sparse import csr_matrix, diags
+
+import stencil
+
+
+def interp(n_from: int, n_to: int) -> csr_matrix:
+    """
+    linear interpolation between two uniform grids of the same interval
+    """
+    s = np.arange(n_to) * (n_from - 1) / (n_to - 1)
+    i = np.minimum(np.floor(s).astype(int), n_from - 2)
+    t = s - i
+    rows = np.repeat(np.arange(n_to), 2)
+    cols = np.stack([i, i + 1], axis=-1).ravel()
+    data = np.stack([1 - t, t], axis=-1).ravel()
+    return csr_matrix((data, (rows, cols)), shape=(n_to, n_from))
+
+
+class Multigrid:
+    """
+    geometric multigrid on the uniform Grid, the coarse levels halve the
+    number of nodes per direction and rediscretize the same stencil
+    """
+
+    def __init__(self, grid, scheme: str, pre=2, post=2, coarsest=5) -> None:
+        self.pre = pre
+        self.post = post
+
+        self.shapes = [grid.shape]
+        while min(self.shapes[-1]) > coarsest:
+            self.shapes.append(tuple((n + 1) // 2 for n in self.shapes[-1]))
+
+        nx = grid.nx
+        self.stencils = [
+            grid.stencil(scheme, grid.h * (nx - 1) / (shape[0] - 1))
+            for shape in self.shapes
+        ]
+
+        # prolongation P, full weighting R = P^T (rows scaled to one), sampling Q
+        self.P, self.R, self.Q = [], [], []
+        for fine, coarse in zip(self.shapes[:-1], self.shapes[1:]):
+            P = [interp(nc, nf) for nf, nc in zip(fine, coarse)]
+            R = [diags(1 / np.asarray(p.sum(axis=0)).ravel()) @ p.T for p in P]
+            Q = [interp(nf, nc) for nf, nc in zip(fine, coarse)]
+            self.P.append([p.tocsr() for p in P])
+            self.R.append([r.tocsr() for r in R])
+            self.Q.append(Q)
+
+        # the coarsest level is a few unknowns, factorized once
+        A = stencil.operator(self.shapes[-1], *self.stencils[-1])
+        self.coarse = lu_factor(A @ np.eye(A.shape[0]))
+
+        self.residuals = []
+
+    @staticmethod
+    def transfer(u: np.ndarray, T: list) -> np.ndarray:
+        for axis, t in enumerate(T):
+            v = np.moveaxis(u, axis, 0)
+            rest = v.shape[1:]
+            v = t @ v.reshape(v.shape[0], -1)
+            u = np.moveaxis(v.reshape((t.shape[0],) + rest), 0, axis)
+        return np.ascontiguousarray(u)
+
+    @staticmethod
+    def set_boundary(u: np.ndarray, value) -> None:
+        for axis in range(u.ndim):
+            face = [slice(None)] * u.ndim
+            face[axis] = [0, -1]
+            u[tuple(face)] = value if np.isscalar(value) else value[tuple(face)]
+
+    def restrict(self, r: np.ndarray, level: int) -> np.ndarray:
+        rc = self.transfer(r, self.R[level])
+        self.set_boundary(rc, 0)
+        return rc
+
+    def prolong(self, e: np.ndarray, level: int) -> np.ndarray:
+        return self.transfer(e, self.P[level])
+
+    def smooth(self, u: np.ndarray, b: np.ndarray, level: int, sweeps: int) -> None:
+        for _ in range(sweeps):
+            stencil.gauss_seidel(u, b, *self.stencils[level])
+
+    def coarse_solve(self, u: np.ndarray, b: np.ndarray) -> None:
+        inner = (slice(1, -1),) * u.ndim
+        r = stencil.residual(u, b, *self.stencils[-1])[inner]
+        u[inner] += lu_solve(self.coarse, r.ravel()).reshape(r.shape)
+
+    def v_cycle(self, u: np.ndarray, b: np.ndarray, level=0) -> np.ndarray:
+        if level == len(self.shapes) - 1:
+            self.coarse_solve(u, b)
+            return u
+
+        self.smooth(u, b, level, self.pre)
+        r = stencil.residual(u, b, *self.stencils[level])
+        rc = self.restrict(r, level)
+        del r
+        ec = self.v_cycle(np.zeros_like(rc), rc, level + 1)
+        u += self.prolong(ec, level)
+        self.smooth(u, b, level, self.post)
+        return u
+
+    def fmg(self, b: np.ndarray) -> np.ndarray:
+        """
+        full multigrid: solve on the coarsest level, then interpolate and
+        apply one V-cycle per level on the way up
+        """
+        bs = [b]
+        for level in range(len(self.shapes) - 1):
+            bs.append(self.transfer(bs[-1], self.Q[level]))
+
+        u = np.zeros_like(bs[-1])
+        self.set_boundary(u, bs[-1])
+        self.coarse_solve(u, bs[-1])
+        for level in range(len(self.shapes) - 2, -1, -1):
+            u = self.prolong(u, level)
+            self.set_boundary(u, bs[level])
+            self.v_cycle(u, bs[level], level)
+        return u
+
+    def solve(self, b: np.ndarray, tol=1e-8, full=False, maxiter=100) -> np.ndarray:
+        if full:
+            u = self.fmg(b)
+        else:
+            u = np.zeros_like(b)
+            self.set_boundary(u, b)
+
+        b_norm = np.linalg.norm(b)
+        self.residuals = [np.linalg.norm(stencil.residual(u, b, *self.stencils[0]))]
+        while self.residuals[-1] > tol * b_norm and len(self.residuals) <= maxiter:
+            self.v_cycle(u, b)
+            self.residuals.append(
+                np.linalg.norm(stencil.residual(u, b, *self.stencils[0]))
+            )
+        return u
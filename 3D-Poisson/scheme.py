@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+#      "
+#    '':''
+#   ___:____      |\/|
+# ,'        `.    \  /
+# |  O        \___/  |
+# ~^~^~^~^~^~^~^~^~^~^
+
+import itertools
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import spsolve, cg
+
+import stencil
+from grid import Grid
+from multigrid import Multigrid
+
+
+class Scheme(Grid):
+    def __init__(self, domain: list, h: float, case=1) -> None:
+        super().__init__(domain, h, case)
+
+    def solve(self, scheme: str, method="fmg", tol=1e-8) -> np.ndarray:
+        match method:
+            case "direct":
+                return self.direct(scheme)
+            case "vcycle" | "fmg":
+                return self.multigrid(scheme, tol, full=method == "fmg")
+            case "cg":
+                return self.matrix_free(scheme, tol)
+            case _:
+                print(f"{method} not define")
+                exit()
+
+    def stencil(self, scheme: str, h=None) -> tuple[list, list]:
+        """
+        seven: second order, nineteen / twentyseven: fourth order compact
+        (Mehrstellen) with the right-hand side f + h^2/12 * lap(f)
+        """
+        h = self.h if h is None else h
+        neighbours = [d for d in itertools.product((-1, 0, 1), repeat=3) if any(d)]
+        faces = [d for d in neighbours if np.abs(d).sum() == 1]
+        edges = [d for d in neighbours if np.abs(d).sum() == 2]
+        corners = [d for d in neighbours if np.abs(d).sum() == 3]
+        match scheme:
+            case "seven":
+                offsets = [(0, 0, 0)] + faces
+                weights = [6 / h**2] + [-1 / h**2] * 6
+            case "nineteen":
+                offsets = [(0, 0, 0)] + faces + edges
+                weights = [24 / (6 * h**2)]
+                weights += [-2 / (6 * h**2)] * 6
+                weights += [-1 / (6 * h**2)] * 12
+            case "twentyseven":
+                offsets = [(0, 0, 0)] + faces + edges + corners
+                weights = [128 / (30 * h**2)]
+                weights += [-14 / (30 * h**2)] * 6
+                weights += [-3 / (30 * h**2)] * 12
+                weights += [-1 / (30 * h**2)] * 8
+            case _:
+                print("scheme not define")
+                exit()
+        return offsets, weights
+
+    def rhs(self, scheme: str) -> np.ndarray:
+        F = np.broadcast_to(self.f(self.X, self.Y, self.Z), self.shape)
+        inner = (slice(1, -1),) * 3
+        b = np.empty(self.shape)
+        match scheme:
+            case "seven":
+                b[inner] = F[inner]
+            case "nineteen" | "twentyseven":
+                b[inner] = F[inner] / 2
+                for d in np.eye(3, dtype=int):
+                    for s in (-1, 1):
+                        b[inner] += F[stencil.shift(self.shape, (1, 1, 1), s * d)] / 12
+            case _:
+                print("scheme not define")
+                exit()
+        bc = self.boundary()
+        b[bc] = np.broadcast_to(self.solution(self.X, self.Y, self.Z), self.shape)[bc]
+        return b
+
+    def interior_matrix(self, scheme: str) -> csr_matrix:
+        """
+        the stencil on the interior unknowns only, symmetric positive definite
+        """
+        offsets, weights = self.stencil(scheme)
+        m = [n - 2 for n in self.shape]
+        I = np.meshgrid(*[np.arange(n) for n in m], indexing="ij")
+
+        rows, cols, data = [], [], []
+        for d, w in zip(offsets, weights):
+            J = [i + di for i, di in zip(I, d)]
+            keep = np.logical_and.reduce([(j >= 0) & (j < n) for j, n in zip(J, m)])
+            rows.append(np.ravel_multi_index([i[keep] for i in I], m))
+            cols.append(np.ravel_multi_index([j[keep] for j in J], m))
+            data.append(np.full(np.count_nonzero(keep), w))
+        rows, cols, data = map(np.concatenate, (rows, cols, data))
+        return csr_matrix((data, (rows, cols)), shape=(np.prod(m),) * 2)
+
+    def lift(self, scheme: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        move the Dirichlet data into the right-hand side of the interior
+        unknowns, returns the field with boundary values and zero inside
+        """
+        inner = (slice(1, -1),) * 3
+        b = self.rhs(scheme)
+        u_num = b.copy()
+        u_num[inner] = 0
+        b = b[inner] - stencil.apply(u_num, *self.stencil(scheme))
+        return u_num, b
+
+    def direct(self, scheme: str) -> np.ndarray:
+        u_num, b = self.lift(scheme)
+        v = spsolve(self.interior_matrix(scheme), b.ravel())
+        u_num[1:-1, 1:-1, 1:-1] = v.reshape(b.shape)
+        return u_num
+
+    def multigrid(self, scheme: str, tol=1e-8, full=False) -> np.ndarray:
+        mg = Multigrid(self, scheme)
+        u_num = mg.solve(self.rhs(scheme), tol, full)
+        self.residuals = mg.residuals
+        return u_num
+
+    def matrix_free(self, scheme: str, tol=1e-8) -> np.ndarray:
+        offsets, weights = self.stencil(scheme)
+        A = stencil.operator(self.shape, offsets, weights)
+        M = stencil.ssor(self.shape, offsets, weights)
+
+        u_num, b = self.lift(scheme)
+        v, info = cg(A, b.ravel(), rtol=tol, M=M)
+        if info != 0:
+            print(f"cg not converge after {info} iterations")
+        u_num[1:-1, 1:-1, 1:-1] = v.reshape(b.shape)
+        return u_num
+
+
+if __name__ == "__main__":
+    scheme = Scheme([-1, 1, -1, 1, -1, 1], 0.05)
+    u_num = scheme.solve("seven")
+
+    u_ref = scheme.solution(scheme.X, scheme.Y, scheme.Z)
+
+    print(f"max_error:{np.max(np.abs(u_num - u_ref)):.3e}")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+#      "
+#    '':''
+#   ___:____      |\/|
+# ,'        `.    \  /
+# |  O        \___/  |
+# ~^~^~^~^~^~^~^~^~^~^
+
+import argparse
+import numpy as np
+import matplotlib.pyplot as plt
+
+from scheme import Scheme
+
+if __name__ == "__main__":
+    # args
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--case", type=int, default=1)
+    parser.add_argument("--h", type=float, default=0.05)
+    parser.add_argument(
+        "--scheme", type=str, default="seven", help="seven nineteen twentyseven"
+    )
+    parser.add_argument(
+        "--method", type=str, default="fmg", help="fmg vcycle cg direct"
+    )
+    parser.add_argument("--tol", type=float, default=1e-8)
+    args = parser.parse_args()
+
+    domain = [-1, 1, -1, 1, -1, 1]
+
+    # solver
+    solver = Scheme(domain, args.h, args.case)
+
+    u_num = solver.solve(args.scheme, args.method, args.tol)
+    u_ref = np.broadcast_to(solver.solution(solver.X, solver.Y, solver.Z), solver.shape)
+
+    # plot the mid z slice
+    k = solver.nz // 2
+    X, Y = np.meshgrid(solver.x, solver.y, indexing="ij")
+
+    fig = plt.figure(figsize=(12, 5), layout="constrained")
+    ax1 = fig.add_subplot(121)
+    con1 = ax1.contourf(X, Y, u_num[:, :, k])
+    fig.colorbar(con1)
+    ax1.set_title(f"{args.scheme} z={solver.z[k]:.3f}")
+
+    ax2 = fig.add_subplot(122)
+    con2 = ax2.contourf(X, Y, u_ref[:, :, k])
+    fig.colorbar(con2)
+    ax2.set_title("ref")
+
+    plt.show()
+
+    max_error = np.max(np.abs(u_num - u_ref))
+    print(f"max_error: {max_error:.3e}")
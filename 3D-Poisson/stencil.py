@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+#      "
+#    '':''
+#   ___:____      |\/|
+# ,'        `.    \  /
+# |  O        \___/  |
+# ~^~^~^~^~^~^~^~^~^~^
+
+"""
+Stencil kernels acting on the 3D field u[i, j, k] (boundary faces included).
+
+A stencil is the (offsets, weights) pair returned by Scheme.stencil, the
+first entry being the centre. Only interior nodes are touched, boundary
+values are Dirichlet data.
+"""
+
+import itertools
+import numpy as np
+from scipy.sparse.linalg import LinearOperator
+
+
+def shift(shape: tuple, start: tuple, d: tuple, step=1) -> tuple:
+    return tuple(slice(s + di, n - 1 + di, step) for n, s, di in zip(shape, start, d))
+
+
+def apply(u: np.ndarray, offsets: list, weights: list) -> np.ndarray:
+    ones = (1,) * u.ndim
+    Au = np.zeros(tuple(n - 2 for n in u.shape))
+    for d, w in zip(offsets, weights):
+        Au += w * u[shift(u.shape, ones, d)]
+    return Au
+
+
+def residual(u: np.ndarray, b: np.ndarray, offsets: list, weights: list) -> np.ndarray:
+    inner = (slice(1, -1),) * u.ndim
+    r = np.zeros_like(u)
+    r[inner] = b[inner] - apply(u, offsets, weights)
+    return r
+
+
+def gauss_seidel(
+    u: np.ndarray, b: np.ndarray, offsets: list, weights: list, omega=1.0, reverse=False
+) -> np.ndarray:
+    """
+    one sweep of 2^d-colour (index parity) Gauss-Seidel / SOR, nodes of the
+    same colour are decoupled for every 3x3x3 stencil
+    """
+    colours = list(itertools.product((1, 2), repeat=u.ndim))
+    zero = (0,) * u.ndim
+    for c in reversed(colours) if reverse else colours:
+        idx = shift(u.shape, c, zero, 2)
+        s = b[idx].copy()
+        for d, w in zip(offsets[1:], weights[1:]):
+            s -= w * u[shift(u.shape, c, d, 2)]
+        u[idx] += omega * (s / weights[0] - u[idx])
+    return u
+
+
+def embed(v: np.ndarray, shape: tuple) -> np.ndarray:
+    u = np.zeros(shape)
+    u[(slice(1, -1),) * len(shape)] = v.reshape([n - 2 for n in shape])
+    return u
+
+
+def operator(shape: tuple, offsets: list, weights: list) -> LinearOperator:
+    """
+    the stencil on the interior unknowns, zero Dirichlet data
+    """
+
+    def matvec(v):
+        return apply(embed(v, shape), offsets, weights).ravel()
+
+    n = int(np.prod([m - 2 for m in shape]))
+    return LinearOperator((n, n), matvec=matvec, rmatvec=matvec, dtype=float)
+
+
+def ssor(shape: tuple, offsets: list, weights: list, omega=1.0) -> LinearOperator:
+    """
+    symmetric multicolour SOR from a zero guess, an SPD preconditioner for CG
+    """
+    inner = (slice(1, -1),) * len(shape)
+
+    def matvec(r):
+        b = embed(r, shape)
+        u = np.zeros(shape)
+        gauss_seidel(u, b, offsets, weights, omega)
+        gauss_seidel(u, b, offsets, weights, omega, reverse=True)
+        return u[inner].ravel()
+
+    n = int(np.prod([m - 2 for m in shape]))
+    return LinearOperator((n, n), matvec=matvec, rmatvec=matvec, dtype=float)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+#      "
+#    '':''
+#   ___:____      |\/|
+# ,'        `.    \  /
+# |  O        \___/  |
+# ~^~^~^~^~^~^~^~^~^~^
+
+import os
+import numpy as np
+import multiprocessing as mp
+from multiprocessing.shared_memory import SharedMemory
+from scipy.sparse import kron
+from scipy.sparse.linalg import splu, cg, LinearOperator
+
+from multigrid import interp
+
+
+def subdomain(conn, r_shm, z_shm, n, lo, hi, offset, A_local) -> None:
+    """
+    worker process: factorize the strip once, then for every request read
+    the residual from shared memory and write the local correction back
+    """
+    r = np.ndarray((n,), buffer=r_shm.buf)
+    z = np.ndarray((offset + hi - lo,), buffer=z_shm.buf)
+    lu = splu(A_local.tocsc())
+    while conn.recv():
+        z[offset:] = lu.solve(r[lo:hi])
+        conn.send(True)
+    conn.close()
+
+
+class Schwarz:
+    """
+    two-level overlapping additive Schwarz preconditioned CG for the SPD
+    interior system, the grid is cut into strips of rows i, one process
+    per strip, plus a coarse grid correction solved in the main process
+    """
+
+    def __init__(self, grid, scheme: str, workers=None, overlap=4) -> None:
+        workers = os.cpu_count() if workers is None else workers
+        self.A = grid.interior_matrix(scheme).tocsr()
+        mx, my = grid.nx - 2, grid.ny - 2
+        self.n = mx * my
+
+        # strips of interior rows, contiguous in the row-major unknowns
+        cuts = np.linspace(0, mx, min(workers, mx) + 1).astype(int)
+        self.ranges = [
+            (max(a - overlap, 0) * my, min(b + overlap, mx) * my)
+            for a, b in zip(cuts[:-1], cuts[1:])
+        ]
+        sizes = [hi - lo for lo, hi in self.ranges]
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)])
+
+        # coarse space: bilinear interpolation from a grid about one node per strip
+        nc = [min(max(2 * len(self.ranges) + 1, 9), n) for n in (grid.nx, grid.ny)]
+        Px, Py = (interp(c, n)[1:-1, 1:-1] for c, n in zip(nc, (grid.nx, grid.ny)))
+        self.P = kron(Px, Py).tocsr()
+        self.coarse = splu((self.P.T @ self.A @ self.P).tocsc())
+
+        self.r_shm = SharedMemory(create=True, size=self.n * 8)
+        self.z_shm = SharedMemory(create=True, size=self.offsets[-1] * 8)
+        self.r = np.ndarray((self.n,), buffer=self.r_shm.buf)
+        self.z = np.ndarray((self.offsets[-1],), buffer=self.z_shm.buf)
+
+        self.conns, self.procs = [], []
+        for (lo, hi), offset in zip(self.ranges, self.offsets):
+            parent, child = mp.Pipe()
+            A_local = self.A[lo:hi, lo:hi]
+            args = (child, self.r_shm, self.z_shm, self.n, lo, hi, offset, A_local)
+            proc = mp.Process(target=subdomain, args=args, daemon=True)
+            proc.start()
+            self.conns.append(parent)
+            self.procs.append(proc)
+
+    def precondition(self, r: np.ndarray) -> np.ndarray:
+        self.r[:] = r
+        for conn in self.conns:
+            conn.send(True)
+
+        z = self.P @ self.coarse.solve(self.P.T @ r)
+        for conn in self.conns:
+            conn.recv()
+        for (lo, hi), offset in zip(self.ranges, self.offsets):
+            z[lo:hi] += self.z[offset : offset + hi - lo]
+        return z
+
+    def solve(self, b: np.ndarray, tol=1e-8) -> np.ndarray:
+        M = LinearOperator(self.A.shape, matvec=self.precondition)
+        self.residuals = []
+        v, info = cg(
+            self.A,
+            b,
+            rtol=tol,
+            M=M,
+            callback=lambda v: self.residuals.append(np.linalg.norm(b - self.A @ v)),
+        )
+        if info != 0:
+            print(f"cg not converge after {info} iterations")
+        return v
+
+    def close(self) -> None:
+        for conn, proc in zip(self.conns, self.procs):
+            conn.send(False)
+            proc.join()
+        del self.r, self.z
+        for shm in (self.r_shm, self.z_shm):
+            shm.close()
+            shm.unlink()
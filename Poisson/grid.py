@@ -18,8 +18,9 @@ class Grid(Problem):
         super().__init__(case)
         self.h = h
         self.x_min, self.x_max, self.y_min, self.y_max = domain
-        self.nx = int((self.x_max - self.x_min) / h)
-        self.ny = int((self.y_max - self.y_min) / h)
+        # nodes h apart, the stencils assume the spacing is exactly h
+        self.nx = int(round((self.x_max - self.x_min) / h)) + 1
+        self.ny = int(round((self.y_max - self.y_min) / h)) + 1
 
         self.x = np.linspace(self.x_min, self.x_max, self.nx)
         self.y = np.linspace(self.y_min, self.y_max, self.ny)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+#      "
+#    '':''
+#   ___:____      |\/|
+# ,'        `.    \  /
+# |  O        \___/  |
+# ~^~^~^~^~^~^~^~^~^~^
+
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+from scipy.sparse import csr_matrix, diags
+
+import stencil
+
+
+def interp(n_from: int, n_to: int) -> csr_matrix:
+    """
+    linear interpolation between two uniform grids of the same interval
+    """
+    s = np.arange(n_to) * (n_from - 1) / (n_to - 1)
+    i = np.minimum(np.floor(s).astype(int), n_from - 2)
+    t = s - i
+    rows = np.repeat(np.arange(n_to), 2)
+    cols = np.stack([i, i + 1], axis=-1).ravel()
+    data = np.stack([1 - t, t], axis=-1).ravel()
+    return csr_matrix((data, (rows, cols)), shape=(n_to, n_from))
+
+
+class Multigrid:
+    """
+    geometric multigrid on the uniform Grid, the coarse levels halve the
+    number of nodes per direction and rediscretize the same stencil
+    """
+
+    def __init__(self, grid, scheme: str, pre=2, post=2, coarsest=5) -> None:
+        if scheme not in ("five", "nine"):
+            print(f"multigrid for {scheme} not define")
+            exit()
+        self.pre = pre
+        self.post = post
+
+        self.shapes = [(grid.nx, grid.ny)]
+        while min(self.shapes[-1]) > coarsest:
+            nx, ny = self.shapes[-1]
+            self.shapes.append(((nx + 1) // 2, (ny + 1) // 2))
+
+        nx = grid.nx
+        self.stencils = [
+            grid.stencil(scheme, grid.h * (nx - 1) / (shape[0] - 1))
+            for shape in self.shapes
+        ]
+
+        # prolongation P, full weighting R = P^T (rows scaled to one), sampling Q
+        self.P, self.R, self.Q = [], [], []
+        for (nf_x, nf_y), (nc_x, nc_y) in zip(self.shapes[:-1], self.shapes[1:]):
+            P = [interp(nc_x, nf_x), interp(nc_y, nf_y)]
+            R = [diags(1 / np.asarray(p.sum(axis=0)).ravel()) @ p.T for p in P]
+            Q = [interp(nf_x, nc_x), interp(nf_y, nc_y)]
+            self.P.append([p.tocsr() for p in P])
+            self.R.append([r.tocsr() for r in R])
+            self.Q.append(Q)
+
+        # the coarsest level is a few unknowns, factorized once
+        A = stencil.operator(*self.shapes[-1], *self.stencils[-1])
+        self.coarse = lu_factor(A @ np.eye(A.shape[0]))
+
+        self.residuals = []
+
+    @staticmethod
+    def transfer(u: np.ndarray, T: list) -> np.ndarray:
+        Tx, Ty = T
+        return Tx @ (Ty @ u.T).T
+
+    def restrict(self, r: np.ndarray, level: int) -> np.ndarray:
+        rc = self.transfer(r, self.R[level])
+        rc[[0, -1], :] = 0
+        rc[:, [0, -1]] = 0
+        return rc
+
+    def prolong(self, e: np.ndarray, level: int) -> np.ndarray:
+        return self.transfer(e, self.P[level])
+
+    def smooth(self, u: np.ndarray, b: np.ndarray, level: int, sweeps: int) -> None:
+        for _ in range(sweeps):
+            stencil.gauss_seidel(u, b, *self.stencils[level])
+
+    def coarse_solve(self, u: np.ndarray, b: np.ndarray) -> None:
+        inner = (slice(1, -1), slice(1, -1))
+        r = stencil.residual(u, b, *self.stencils[-1])[inner]
+        u[inner] += lu_solve(self.coarse, r.ravel()).reshape(r.shape)
+
+    def v_cycle(self, u: np.ndarray, b: np.ndarray, level=0) -> np.ndarray:
+        if level == len(self.shapes) - 1:
+            self.coarse_solve(u, b)
+            return u
+
+        self.smooth(u, b, level, self.pre)
+        r = stencil.residual(u, b, *self.stencils[level])
+        rc = self.restrict(r, level)
+        ec = self.v_cycle(np.zeros_like(rc), rc, level + 1)
+        u += self.prolong(ec, level)
+        self.smooth(u, b, level, self.post)
+        return u
+
+    def fmg(self, b: np.ndarray) -> np.ndarray:
+        """
+        full multigrid: solve on the coarsest level, then interpolate and
+        apply one V-cycle per level on the way up
+        """
+        bs = [b]
+        for level in range(len(self.shapes) - 1):
+            bs.append(self.transfer(bs[-1], self.Q[level]))
+
+        u = bs[-1].copy()
+        u[1:-1, 1:-1] = 0
+        self.coarse_solve(u, bs[-1])
+        for level in range(len(self.shapes) - 2, -1, -1):
+            u = self.prolong(u, level)
+            u[[0, -1], :] = bs[level][[0, -1], :]
+            u[:, [0, -1]] = bs[level][:, [0, -1]]
+            self.v_cycle(u, bs[level], level)
+        return u
+
+    def solve(self, b: np.ndarray, tol=1e-8, full=False, maxiter=100) -> np.ndarray:
+        if full:
+            u = self.fmg(b)
+        else:
+            u = b.copy()
+            u[1:-1, 1:-1] = 0
+
+        b_norm = np.linalg.norm(b)
+        self.residuals = [np.linalg.norm(stencil.residual(u, b, *self.stencils[0]))]
+        while self.residuals[-1] > tol * b_norm and len(self.residuals) <= maxiter:
+            self.v_cycle(u, b)
+            self.residuals.append(
+                np.linalg.norm(stencil.residual(u, b, *self.stencils[0]))
+            )
+        return u
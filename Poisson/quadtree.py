@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+#      "
+#    '':''
+#   ___:____      |\/|
+# ,'        `.    \  /
+# |  O        \___/  |
+# ~^~^~^~^~^~^~^~^~^~^
+
+import numpy as np
+import matplotlib.pyplot as plt
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import spsolve
+
+from problem import Problem
+
+
+class Quadtree(Problem):
+    """
+    vertex centred finite differences on a 2:1 balanced quadtree
+
+    cells are (i, j, s) on an integer lattice of spacing h0 / 2**max_level,
+    (i, j) the lower left corner and s the size; nodes are cell corners,
+    a node in the middle of a leaf edge is hanging and takes the quadratic
+    interpolation along the edge, every unknown gets the Shortley-Weller
+    stencil to its nearest non-hanging neighbours
+    """
+
+    def __init__(self, domain: list, h0: float, case=1, max_level=12) -> None:
+        super().__init__(case)
+        self.x_min, self.x_max, self.y_min, self.y_max = domain
+        self.max_level = max_level
+        size = 2**max_level
+        self.n0x = int(round((self.x_max - self.x_min) / h0))
+        self.n0y = int(round((self.y_max - self.y_min) / h0))
+        self.unit = (self.x_max - self.x_min) / (self.n0x * size)
+        self.width, self.height = self.n0x * size, self.n0y * size
+
+        self.leaves = {
+            (i * size, j * size, size) for i in range(self.n0x) for j in range(self.n0y)
+        }
+        self.residuals = []
+
+    def locate(self, i: int, j: int) -> tuple | None:
+        s = 1
+        while s <= 2**self.max_level:
+            cell = (i - i % s, j - j % s, s)
+            if cell in self.leaves:
+                return cell
+            s *= 2
+        return None
+
+    def refine(self, cells) -> None:
+        for i, j, s in cells:
+            self.leaves.discard((i, j, s))
+            h = s // 2
+            self.leaves |= {(i, j, h), (i + h, j, h), (i, j + h, h), (i + h, j + h, h)}
+        self.balance()
+
+    def balance(self) -> None:
+        """
+        refine until edge neighbours differ by at most one level
+        """
+        todo = set(self.leaves)
+        while todo:
+            coarse = set()
+            for i, j, s in todo:
+                for p in ((i - 1, j), (i + s, j), (i, j - 1), (i, j + s)):
+                    if 0 <= p[0] < self.width and 0 <= p[1] < self.height:
+                        nb = self.locate(*p)
+                        if nb is not None and nb[2] > 2 * s:
+                            coarse.add(nb)
+            todo = set()
+            for i, j, s in coarse:
+                self.leaves.discard((i, j, s))
+                h = s // 2
+                children = {(i, j, h), (i + h, j, h), (i, j + h, h), (i + h, j + h, h)}
+                self.leaves |= children
+                todo |= children
+
+    def on_boundary(self, p: tuple) -> bool:
+        return p[0] in (0, self.width) or p[1] in (0, self.height)
+
+    def topology(self) -> None:
+        """
+        nodes, hanging constraints and, for every node, the size of the leaf
+        in each quadrant (NE, NW, SW, SE)
+        """
+        quadrants = {}
+        for i, j, s in self.leaves:
+            for p, q in (
+                ((i, j), 0),
+                ((i + s, j), 1),
+                ((i + s, j + s), 2),
+                ((i, j + s), 3),
+            ):
+                quadrants.setdefault(p, [0] * 4)[q] = s
+
+        hanging = {}
+        for i, j, s in self.leaves:
+            if s < 2:
+                continue
+            h = s // 2
+            for m, a, b in (
+                ((i + h, j), (i, j), (i + s, j)),
+                ((i + h, j + s), (i, j + s), (i + s, j + s)),
+                ((i, j + h), (i, j), (i, j + s)),
+                ((i + s, j + h), (i + s, j), (i + s, j + s)),
+            ):
+                if m in quadrants and not self.on_boundary(m):
+                    hanging[m] = (a, b)
+
+        self.nodes = sorted(quadrants)
+        self.quadrants = quadrants
+        self.hanging = hanging
+        self.unknowns = [
+            p for p in self.nodes if p not in hanging and not self.on_boundary(p)
+        ]
+        self.index = {p: k for k, p in enumerate(self.unknowns)}
+
+    def arm(self, p: tuple, d: tuple) -> int | None:
+        """
+        distance from p to the next node in direction d, None outside
+        """
+        side = {(1, 0): (0, 3), (-1, 0): (1, 2), (0, 1): (0, 1), (0, -1): (2, 3)}[d]
+        sizes = [self.quadrants[p][q] for q in side if self.quadrants[p][q]]
+        return min(sizes) if sizes else None
+
+    def neighbour(self, p: tuple, d: tuple) -> tuple:
+        """
+        next node from p in direction d, hanging nodes on the same line are
+        passed over to the end point of their edge
+        """
+        s = self.arm(p, d)
+        q = (p[0] + d[0] * s, p[1] + d[1] * s)
+        while q in self.hanging and (q[0] - p[0]) * (q[1] - p[1]) == 0:
+            a, b = self.hanging[q]
+            if (a[0] - q[0]) * d[1] != (a[1] - q[1]) * d[0]:
+                break
+            q = a if (a[0] - q[0]) * d[0] + (a[1] - q[1]) * d[1] > 0 else b
+        return q
+
+    def expand(self, p: tuple) -> list:
+        """
+        a node as a combination of unknown or boundary nodes, a hanging node
+        is the quadratic interpolation along its edge through both end points
+        and the next node beyond one of them
+        """
+        if p not in self.hanging:
+            return [(p, 1.0)]
+        a, b = self.hanging[p]
+        h = abs(b[0] - p[0]) + abs(b[1] - p[1])
+        t = {a: -h, b: h}
+        for end, sign in ((b, 1), (a, -1)):
+            d = ((end[0] - p[0]) // h, (end[1] - p[1]) // h)
+            if self.arm(end, d) is None:
+                continue
+            q = self.neighbour(end, d)
+            if q not in self.hanging:
+                t[q] = sign * (abs(q[0] - p[0]) + abs(q[1] - p[1]))
+                break
+
+        out = []
+        for q, tq in t.items():
+            w = np.prod([-tr / (tq - tr) for r, tr in t.items() if r != q])
+            out += [(r, w * c) for r, c in self.expand(q)]
+        return out
+
+    def coordinates(self, nodes: list) -> tuple[np.ndarray, np.ndarray]:
+        P = np.array(nodes, dtype=float)
+        return self.x_min + P[:, 0] * self.unit, self.y_min + P[:, 1] * self.unit
+
+    def source(self, nodes: list, spacing: np.ndarray) -> np.ndarray:
+        x, y = self.coordinates(nodes)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            F = np.broadcast_to(self.f(x, y), x.shape).astype(float)
+
+        # f singular on a node: mean over the points a quarter spacing away
+        bad = ~np.isfinite(F)
+        d = spacing[bad] / 4
+        F[bad] = (
+            sum(
+                self.f(x[bad] + sx * d, y[bad] + sy * d)
+                for sx in (-1, 1)
+                for sy in (-1, 1)
+            )
+            / 4
+        )
+        return F
+
+    def assemble(self) -> tuple[csr_matrix, np.ndarray]:
+        self.topology()
+        n = len(self.unknowns)
+        rows, cols, data = [], [], []
+        b = np.zeros(n)
+
+        spacing = np.array([min(self.quadrants[p]) for p in self.unknowns])
+        F = self.source(self.unknowns, spacing * self.unit)
+        for k, p in enumerate(self.unknowns):
+            b[k] = F[k]
+            for axis in ((1, 0), (0, 1)):
+                back = (-axis[0], -axis[1])
+                qp, qm = self.neighbour(p, axis), self.neighbour(p, back)
+                hp = (abs(qp[0] - p[0]) + abs(qp[1] - p[1])) * self.unit
+                hm = (abs(qm[0] - p[0]) + abs(qm[1] - p[1])) * self.unit
+                for q, hd in ((qp, hp), (qm, hm)):
+                    w = -2 / (hd * (hp + hm))
+                    for r, c in self.expand(q):
+                        if r in self.index:
+                            rows.append(k)
+                            cols.append(self.index[r])
+                            data.append(w * c)
+                        else:
+                            x, y = self.coordinates([r])
+                            b[k] -= w * c * self.solution(x[0], y[0])
+                rows.append(k)
+                cols.append(k)
+                data.append(2 / (hp * hm))
+        return csr_matrix((data, (rows, cols)), shape=(n, n)), b
+
+    def values(self, v: np.ndarray) -> dict:
+        """
+        the discrete solution on every node, hanging ones interpolated
+        """
+        u = dict(zip(self.unknowns, v))
+        for p in self.nodes:
+            if p not in u and p not in self.hanging:
+                x, y = self.coordinates([p])
+                u[p] = self.solution(x[0], y[0])
+        for p in self.hanging:
+            u[p] = sum(w * u[q] for q, w in self.expand(p))
+        return u
+
+    def estimate(self, u: dict) -> tuple[list, np.ndarray]:
+        """
+        gradient recovery (Zienkiewicz-Zhu) indicator in the max norm:
+        s * max over the corners of |recovered nodal gradient - cell gradient|
+        """
+        cells = list(self.leaves)
+        C = np.array(cells)
+        i, j, s = C[:, 0], C[:, 1], C[:, 2]
+        corners = [(i, j), (i + s, j), (i + s, j + s), (i, j + s)]
+        U = [np.array([u[p] for p in zip(ci, cj)]) for ci, cj in corners]
+        hs = s * self.unit
+        g = np.stack(
+            [
+                (U[1] + U[2] - U[0] - U[3]) / (2 * hs),
+                (U[2] + U[3] - U[0] - U[1]) / (2 * hs),
+            ],
+            axis=-1,
+        )
+
+        index = {p: k for k, p in enumerate(self.nodes)}
+        K = [np.array([index[p] for p in zip(ci, cj)]) for ci, cj in corners]
+        G = np.zeros((len(self.nodes), 2))
+        count = np.zeros(len(self.nodes))
+        for k in K:
+            np.add.at(G, k, g)
+            np.add.at(count, k, 1)
+        G /= count[:, None]
+
+        eta = hs * np.max([np.abs(G[k] - g).max(axis=-1) for k in K], axis=0)
+        return cells, eta
+
+    def solve(self, tol=1e-2, max_iter=30) -> dict:
+        """
+        solve, estimate, refine every leaf with indicator above tol, repeat
+        """
+        for _ in range(max_iter):
+            A, b = self.assemble()
+            u = self.values(spsolve(A, b))
+            cells, eta = self.estimate(u)
+            self.residuals.append(eta.max())
+            marked = [c for c, e in zip(cells, eta) if e > tol and c[2] > 1]
+            if not marked:
+                break
+            self.refine(marked)
+        return u
+
+    def plot_grid(self) -> None:
+        ax = plt.subplot()
+        for i, j, s in self.leaves:
+            x, y = self.coordinates([(i, j), (i + s, j + s)])
+            ax.add_patch(
+                plt.Rectangle(
+                    (x[0], y[0]), x[1] - x[0], y[1] - y[0], fill=False, lw=0.3
+                )
+            )
+        ax.set_xlim(self.x_min, self.x_max)
+        ax.set_ylim(self.y_min, self.y_max)
+        ax.set_aspect("equal")
+
+        ax.set_xlabel(r"x")
+        ax.set_ylabel(r"y")
+
+        plt.show()
+
+
+if __name__ == "__main__":
+    tree = Quadtree([-1, 1, -1, 1], 0.125, case=4)
+    u = tree.solve(tol=1e-2)
+
+    x, y = tree.coordinates(tree.nodes)
+    u_num = np.array([u[p] for p in tree.nodes])
+    max_error = np.max(np.abs(u_num - tree.solution(x, y)))
+    print(f"unknowns: {len(tree.unknowns)} max_error: {max_error:.3e}")
+
+    tree.plot_grid()
@@ -9,18 +9,63 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
+from scipy.fft import dstn, idstn
 from scipy.sparse import csr_matrix
-from scipy.sparse.linalg import spsolve
+from scipy.sparse.linalg import splu, spilu, cg, LinearOperator
+
+# optional: scikit-sparse (CHOLMOD) for method cholesky/pcg, without it
+# SuperLU factorizes the interior matrix in symmetric mode
+try:
+    from sksparse.cholmod import cholesky
+except ImportError:
+    cholesky = None
 
 from grid import Grid
+from problem import Problem
+import stencil
+from multigrid import Multigrid, interp
+from decomposition import Schwarz
+
+# SuperLU options for a symmetric matrix
+symmetric = dict(
+    permc_spec="MMD_AT_PLUS_A", diag_pivot_thresh=0, options=dict(SymmetricMode=True)
+)
 
 
 class Scheme(Grid):
+    # (domain, h, scheme, kind) -> (A, factor), shared by every Scheme on that
+    # grid; the cache_size most recently used are kept
+    cache = {}
+    cache_size = 8
+
     def __init__(self, domain: list, h: float, case=1, show_non_zero=False) -> None:
         super().__init__(domain, h, case)
         self.show_non_zero = show_non_zero
 
-    def solve(self, scheme: str) -> np.ndarray:
+    def solve(
+        self, scheme: str, method="direct", tol=1e-8, u0=None, workers=None
+    ) -> np.ndarray:
+        match method:
+            case "direct":
+                pass
+            case "vcycle" | "fmg":
+                return self.multigrid(scheme, tol, full=method == "fmg")
+            case "cg":
+                return self.matrix_free(scheme, tol)
+            case "cholesky" | "pcg":
+                return self.spd(scheme, method, tol)
+            case "sor" | "jacobi":
+                return self.relax(scheme, method, tol, u0)
+            case "schwarz":
+                return self.schwarz(scheme, tol, workers)
+            case "mixed":
+                return self.mixed(scheme, tol)
+            case "richardson":
+                return self.richardson(scheme)
+            case _:
+                print(f"{method} not define")
+                exit()
+
         match scheme:
             case "five":
                 u_num = self.five_point()
@@ -28,125 +73,337 @@ class Scheme(Grid):
                 u_num = self.oblique_five()
             case "nine":
                 u_num = self.nine()
+            case "five_fft" | "oblique_five_fft" | "nine_fft":
+                u_num = self.fast(scheme.removesuffix("_fft"))
             case _:
                 print("scheme not define")
                 exit()
         return u_num.reshape(self.nx, self.ny)
 
-    def idx(self, i: int, j: int) -> int:
+    def idx(self, i: int | np.ndarray, j: int | np.ndarray) -> int | np.ndarray:
         return i * self.ny + j
 
-    def five_point(self) -> np.ndarray:
-        indptr, indices, data = [0], [], []
-        b = np.zeros(self.nx * self.ny)
-        for i in range(self.nx):
-            for j in range(self.ny):
-                c = self.idx(i, j)
-                if i in (0, self.nx - 1) or j in (0, self.ny - 1):
-                    indptr.append(indptr[-1] + 1)
-                    indices.append(c)
-                    data.append(1)
-                    b[c] += self.solution(self.x[i], self.y[j])
-                else:
-                    n, s, w, e = (
-                        self.idx(i - 1, j),
-                        self.idx(i + 1, j),
-                        self.idx(i, j - 1),
-                        self.idx(i, j + 1),
-                    )
-                    indptr.append(indptr[-1] + 5)
-                    indices += [c, n, s, w, e]
-                    data += [4 / self.h**2]
-                    data += [-1 / self.h**2] * 4
-                    b[c] += self.f(self.x[i], self.y[j])
-        A = csr_matrix((data, indices, indptr))
+    def stencil(self, scheme: str, h=None) -> tuple[list, list]:
+        h = self.h if h is None else h
+        match scheme:
+            case "five":
+                offsets = [(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)]
+                weights = [4 / h**2] + [-1 / h**2] * 4
+            case "oblique_five":
+                offsets = [(0, 0), (-1, 1), (1, 1), (-1, -1), (1, -1)]
+                weights = [4 / (2 * h**2)] + [-1 / (2 * h**2)] * 4
+            case "nine":
+                offsets = [(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)]
+                offsets += [(-1, 1), (1, 1), (-1, -1), (1, -1)]
+                weights = [10 / (3 * h**2)]
+                weights += [-2 / (3 * h**2)] * 4
+                weights += [-1 / (6 * h**2)] * 4
+            case _:
+                print("scheme not define")
+                exit()
+        return offsets, weights
+
+    def boundary(self) -> np.ndarray:
+        mask = np.zeros((self.nx, self.ny), dtype=bool)
+        mask[[0, -1], :] = True
+        mask[:, [0, -1]] = True
+        return mask
+
+    def matrix(self, scheme: str) -> csr_matrix:
+        offsets, weights = self.stencil(scheme)
+        I, J = np.meshgrid(np.arange(self.nx), np.arange(self.ny), indexing="ij")
+        bc = self.boundary()
+
+        # one row per node: the full stencil inside, the diagonal on the boundary
+        indices = np.stack([self.idx(I + di, J + dj) for di, dj in offsets], axis=-1)
+        data = np.broadcast_to(np.array(weights), indices.shape).copy()
+        data[bc, 0] = 1
+        keep = np.ones(indices.shape, dtype=bool)
+        keep[bc, 1:] = False
+
+        indptr = np.zeros(self.nx * self.ny + 1, dtype=indices.dtype)
+        np.cumsum(keep.sum(axis=-1).ravel(), out=indptr[1:])
+        return csr_matrix((data[keep], indices[keep], indptr))
+
+    def interior_matrix(self, scheme: str) -> csr_matrix:
+        """
+        the stencil on the interior unknowns only, symmetric positive definite
+        """
+        offsets, weights = self.stencil(scheme)
+        mx, my = self.nx - 2, self.ny - 2
+        I, J = np.meshgrid(np.arange(mx), np.arange(my), indexing="ij")
+
+        rows, cols, data = [], [], []
+        for (di, dj), w in zip(offsets, weights):
+            keep = (I + di >= 0) & (I + di < mx) & (J + dj >= 0) & (J + dj < my)
+            rows.append((I * my + J)[keep])
+            cols.append(((I + di) * my + J + dj)[keep])
+            data.append(np.full(np.count_nonzero(keep), w))
+        rows, cols, data = map(np.concatenate, (rows, cols, data))
+        return csr_matrix((data, (rows, cols)), shape=(mx * my, mx * my))
+
+    def rhs(self, scheme: str, problem=None) -> np.ndarray:
+        problem = self if problem is None else problem
+        with np.errstate(divide="ignore", invalid="ignore"):
+            F = np.broadcast_to(problem.f(self.X, self.Y), self.X.shape).astype(float)
+
+        # f singular on a node: mean over the points a quarter spacing away
+        bad = ~np.isfinite(F)
+        d = self.h / 4
+        F[bad] = (
+            sum(
+                problem.f(self.X[bad] + sx * d, self.Y[bad] + sy * d)
+                for sx in (-1, 1)
+                for sy in (-1, 1)
+            )
+            / 4
+        )
+        b = np.empty((self.nx, self.ny))
+        match scheme:
+            case "five" | "oblique_five":
+                b[1:-1, 1:-1] = F[1:-1, 1:-1]
+            case "nine":
+                # f + h^2 / 12 * laplace(f), the five point laplacian of f
+                b[1:-1, 1:-1] = 2 / 3 * F[1:-1, 1:-1]
+                b[1:-1, 1:-1] += (
+                    F[:-2, 1:-1] + F[2:, 1:-1] + F[1:-1, :-2] + F[1:-1, 2:]
+                ) / 12
+            case _:
+                print("scheme not define")
+                exit()
+        bc = self.boundary()
+        b[bc] = problem.solution(self.X[bc], self.Y[bc])
+        return b.ravel()
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """
+        drop every cached factorization
+        """
+        cls.cache.clear()
+
+    def factorize(self, scheme: str, kind="lu"):
+        key = (self.x_min, self.x_max, self.y_min, self.y_max, self.h, scheme, kind)
+        if key in Scheme.cache:
+            # most recently used last
+            Scheme.cache[key] = Scheme.cache.pop(key)
+        else:
+            match kind:
+                case "lu":
+                    A = self.matrix(scheme)
+                    factor = splu(A.tocsc())
+                case "cholesky" if cholesky is not None:
+                    A = self.interior_matrix(scheme)
+                    factor = cholesky(A.tocsc())
+                case "cholesky":
+                    # SuperLU in symmetric mode: no pivoting, A + A^T ordering
+                    A = self.interior_matrix(scheme)
+                    factor = splu(A.tocsc(), **symmetric).solve
+                case "ilu":
+                    A = self.interior_matrix(scheme)
+                    ilu = spilu(A.tocsc(), drop_tol=1e-4, fill_factor=10, **symmetric)
+                    factor = LinearOperator(A.shape, matvec=ilu.solve)
+                case "single":
+                    A = self.interior_matrix(scheme).astype(np.float32)
+                    factor = splu(A.tocsc(), **symmetric).solve
+            Scheme.cache[key] = (A, factor)
+            while len(Scheme.cache) > Scheme.cache_size:
+                del Scheme.cache[next(iter(Scheme.cache))]
+        return Scheme.cache[key]
+
+    def direct(self, scheme: str) -> np.ndarray:
+        A, lu = self.factorize(scheme)
+        b = self.rhs(scheme)
 
         if self.show_non_zero:
             plt.matshow(A.toarray())
 
-        u_num = spsolve(A, b)
+        u_num = lu.solve(b)
         return u_num
 
-    def oblique_five(self) -> np.ndarray:
-        indptr, indices, data = [0], [], []
-        b = np.zeros(self.nx * self.ny)
-        for i in range(self.nx):
-            for j in range(self.ny):
-                c = self.idx(i, j)
-                if i in (0, self.nx - 1) or j in (0, self.ny - 1):
-                    indptr.append(indptr[-1] + 1)
-                    indices.append(c)
-                    data.append(1)
-                    b[c] += self.solution(self.x[i], self.y[j])
-                else:
-                    ne, se, nw, sw = (
-                        self.idx(i - 1, j + 1),
-                        self.idx(i + 1, j + 1),
-                        self.idx(i - 1, j - 1),
-                        self.idx(i + 1, j - 1),
-                    )
-                    indptr.append(indptr[-1] + 5)
-                    indices += [c, ne, se, nw, sw]
-                    data += [4 / (2 * self.h**2)]
-                    data += [-1 / (2 * self.h**2)] * 4
-                    b[c] += self.f(self.x[i], self.y[j])
-        A = csr_matrix((data, indices, indptr))
+    def solve_batch(self, scheme: str, problems: list) -> np.ndarray:
+        """
+        problems: cases of Problem, or objects providing f and solution,
+        solved as one multi-column solve against the cached factorization
+        """
+        problems = [Problem(p) if isinstance(p, int) else p for p in problems]
+        _, lu = self.factorize(scheme)
+        B = np.stack([self.rhs(scheme, p) for p in problems], axis=-1)
+        U = lu.solve(B)
+        return U.T.reshape(len(problems), self.nx, self.ny)
 
-        if self.show_non_zero:
-            plt.matshow(A.toarray())
+    def multigrid(self, scheme: str, tol=1e-8, full=False) -> np.ndarray:
+        mg = Multigrid(self, scheme)
+        u_num = mg.solve(self.rhs(scheme).reshape(self.nx, self.ny), tol, full)
+        self.residuals = mg.residuals
+        return u_num
+
+    def richardson(self, scheme: str, levels=2) -> np.ndarray:
+        """
+        Romberg table of the direct solutions on h, h/2, ..., h/2^(levels-1)
+        at the nodes of this grid, the error expands in even powers of h from
+        h^2 (five, oblique_five) or h^4 (nine); self.error_estimate is the
+        difference of the last two columns
+        """
+        p = 4 if scheme.removesuffix("_fft") == "nine" else 2
+        domain = [self.x_min, self.x_max, self.y_min, self.y_max]
+
+        T = []
+        for k in range(levels):
+            grid = self if k == 0 else Scheme(domain, self.h / 2**k, self.case)
+            u = grid.solve(scheme).reshape(grid.nx, grid.ny)[:: 2**k, :: 2**k]
+            row = [u]
+            for j in range(1, k + 1):
+                q = 2 ** (p + 2 * (j - 1))
+                row.append(row[-1] + (row[-1] - T[-1][j - 1]) / (q - 1))
+            T.append(row)
+
+        self.error_estimate = np.abs(T[-1][-1] - T[-1][-2]) if levels > 1 else None
+        return T[-1][-1]
+
+    def lift(self, scheme: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        move the Dirichlet data into the right-hand side of the interior
+        unknowns, returns the field with boundary values and zero inside
+        """
+        offsets, weights = self.stencil(scheme)
+        b = self.rhs(scheme).reshape(self.nx, self.ny)
+        u_num = b.copy()
+        u_num[1:-1, 1:-1] = 0
+        b = b[1:-1, 1:-1] - stencil.apply(u_num, offsets, weights)
+        return u_num, b
 
-        u_num = spsolve(A, b)
+    def matrix_free(self, scheme: str, tol=1e-8) -> np.ndarray:
+        offsets, weights = self.stencil(scheme)
+        A = stencil.operator(self.nx, self.ny, offsets, weights)
+        M = stencil.ssor(self.nx, self.ny, offsets, weights)
+
+        u_num, b = self.lift(scheme)
+        v, info = cg(A, b.ravel(), rtol=tol, M=M)
+        if info != 0:
+            print(f"cg not converge after {info} iterations")
+        u_num[1:-1, 1:-1] = v.reshape(self.nx - 2, self.ny - 2)
         return u_num
 
-    def nine(self) -> np.ndarray:
-        indptr, indices, data = [0], [], []
-        b = np.zeros(self.nx * self.ny)
-        for i in range(self.nx):
-            for j in range(self.ny):
-                c = self.idx(i, j)
-                if i in (0, self.nx - 1) or j in (0, self.ny - 1):
-                    indptr.append(indptr[-1] + 1)
-                    indices.append(c)
-                    data.append(1)
-                    b[c] += self.solution(self.x[i], self.y[j])
-                else:
-                    n, s, w, e = (
-                        self.idx(i - 1, j),
-                        self.idx(i + 1, j),
-                        self.idx(i, j - 1),
-                        self.idx(i, j + 1),
-                    )
-                    ne, se, nw, sw = (
-                        self.idx(i - 1, j + 1),
-                        self.idx(i + 1, j + 1),
-                        self.idx(i - 1, j - 1),
-                        self.idx(i + 1, j - 1),
-                    )
-                    indptr.append(indptr[-1] + 9)
-                    indices += [c, n, s, w, e, ne, se, nw, sw]
-                    data += [10 / (3 * self.h**2)]
-                    data += [-2 / (3 * self.h**2)] * 4
-                    data += [-1 / (6 * self.h**2)] * 4
-
-                    b[c] += (1 - self.h**2 / 3) * self.f(self.x[i], self.y[j])
-                    b[c] += (
-                        self.h**2
-                        / 12
-                        * (
-                            self.f(self.x[i - 1], self.y[j])
-                            + self.f(self.x[i + 1], self.y[j])
-                            + self.f(self.x[i], self.y[j - 1])
-                            + self.f(self.x[i], self.y[j + 1])
-                        )
-                    )
-        A = csr_matrix((data, indices, indptr))
+    def mixed(self, scheme: str, tol=1e-8, maxiter=50) -> np.ndarray:
+        """
+        iterative refinement: corrections from a float32 factorization of the
+        interior system, residuals in float64 with the stencil
+        """
+        offsets, weights = self.stencil(scheme)
+        _, factor = self.factorize(scheme, "single")
 
-        if self.show_non_zero:
-            plt.matshow(A.toarray())
+        b = self.rhs(scheme).reshape(self.nx, self.ny)
+        u_num = b.copy()
+        u_num[1:-1, 1:-1] = 0
+
+        b_norm = np.linalg.norm(b)
+        r = stencil.residual(u_num, b, offsets, weights)
+        self.residuals = [np.linalg.norm(r)]
+        while self.residuals[-1] > tol * b_norm and len(self.residuals) <= maxiter:
+            e = factor(r[1:-1, 1:-1].ravel().astype(np.float32))
+            u_num[1:-1, 1:-1] += e.reshape(self.nx - 2, self.ny - 2)
+            r = stencil.residual(u_num, b, offsets, weights)
+            self.residuals.append(np.linalg.norm(r))
+            if self.residuals[-1] >= self.residuals[-2]:
+                break
+        return u_num
+
+    def spd(self, scheme: str, method="cholesky", tol=1e-8) -> np.ndarray:
+        """
+        Dirichlet rows eliminated: sparse Cholesky (scikit-sparse if installed,
+        else symmetric SuperLU) or ILU preconditioned CG
+        """
+        u_num, b = self.lift(scheme)
+        if method == "cholesky":
+            _, factor = self.factorize(scheme, "cholesky")
+            v = factor(b.ravel())
+        else:
+            A, M = self.factorize(scheme, "ilu")
+            v, info = cg(A, b.ravel(), rtol=tol, M=M)
+            if info != 0:
+                print(f"cg not converge after {info} iterations")
+        u_num[1:-1, 1:-1] = v.reshape(self.nx - 2, self.ny - 2)
+        return u_num
+
+    def eigenvalues(self, scheme: str) -> np.ndarray:
+        """
+        the symmetric stencils are diagonalized by the DST-I on the interior,
+        eigenvalue sum_k w_k cos(pi*p*di/(nx-1)) cos(pi*q*dj/(ny-1))
+        """
+        offsets, weights = self.stencil(scheme)
+        cx = np.pi * np.arange(1, self.nx - 1) / (self.nx - 1)
+        cy = np.pi * np.arange(1, self.ny - 1) / (self.ny - 1)
+        return sum(
+            w * np.outer(np.cos(di * cx), np.cos(dj * cy))
+            for (di, dj), w in zip(offsets, weights)
+        )
+
+    def schwarz(self, scheme: str, tol=1e-8, workers=None) -> np.ndarray:
+        dd = Schwarz(self, scheme, workers)
+        u_num, b = self.lift(scheme)
+        try:
+            v = dd.solve(b.ravel(), tol)
+        finally:
+            dd.close()
+        self.residuals = dd.residuals
+        u_num[1:-1, 1:-1] = v.reshape(self.nx - 2, self.ny - 2)
+        return u_num
 
-        u_num = spsolve(A, b)
+    def fast(self, scheme: str) -> np.ndarray:
+        lam = self.eigenvalues(scheme)
+        u_num, b = self.lift(scheme)
+        u_num[1:-1, 1:-1] = idstn(dstn(b, type=1) / lam, type=1)
         return u_num
 
+    def omega(self, scheme: str, method: str) -> float:
+        """
+        SOR: 2 / (1 + sqrt(1 - rho_J^2)), Jacobi: 2 * w_0 / (lam_min + lam_max)
+        """
+        lam = self.eigenvalues(scheme) / self.stencil(scheme)[1][0]
+        match method:
+            case "sor":
+                rho = np.max(np.abs(1 - lam))
+                return 2 / (1 + np.sqrt(1 - rho**2))
+            case "jacobi":
+                return 2 / (lam.min() + lam.max())
+
+    def relax(
+        self, scheme: str, method="sor", tol=1e-8, u0=None, maxiter=100000
+    ) -> np.ndarray:
+        """
+        u0: initial guess, on this grid or on a coarser one (interpolated)
+        """
+        offsets, weights = self.stencil(scheme)
+        omega = self.omega(scheme, method)
+        sweep = stencil.gauss_seidel if method == "sor" else stencil.jacobi
+
+        b = self.rhs(scheme).reshape(self.nx, self.ny)
+        u_num = np.zeros_like(b)
+        if u0 is not None:
+            T = [interp(n, m) for n, m in zip(u0.shape, b.shape)]
+            u_num = Multigrid.transfer(u0, T)
+        u_num[[0, -1], :] = b[[0, -1], :]
+        u_num[:, [0, -1]] = b[:, [0, -1]]
+
+        b_norm = np.linalg.norm(b)
+        self.residuals = [np.linalg.norm(stencil.residual(u_num, b, offsets, weights))]
+        while self.residuals[-1] > tol * b_norm and len(self.residuals) <= maxiter:
+            sweep(u_num, b, offsets, weights, omega)
+            self.residuals.append(
+                np.linalg.norm(stencil.residual(u_num, b, offsets, weights))
+            )
+        return u_num
+
+    def five_point(self) -> np.ndarray:
+        return self.direct("five")
+
+    def oblique_five(self) -> np.ndarray:
+        return self.direct("oblique_five")
+
+    def nine(self) -> np.ndarray:
+        return self.direct("nine")
+
 
 if __name__ == "__main__":
     scheme = Scheme([-1, 1, -1, 1], 0.05)
@@ -12,6 +12,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 
 from scheme import Scheme
+from quadtree import Quadtree
 
 if __name__ == "__main__":
     # args
@@ -20,17 +21,47 @@ if __name__ == "__main__":
     parser.add_argument("--h", type=float, default=0.05)
     parser.add_argument("--show_non_zero", type=int, default=0, help="0 or 1")
     parser.add_argument(
-        "--scheme", type=str, default="five", help="five nine oblique_five"
+        "--scheme",
+        type=str,
+        default="five",
+        help="five nine oblique_five five_fft nine_fft oblique_five_fft",
+    )
+    parser.add_argument(
+        "--method",
+        type=str,
+        default="direct",
+        help="direct vcycle fmg cg cholesky pcg sor jacobi schwarz mixed richardson",
+    )
+    parser.add_argument("--tol", type=float, default=1e-8)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--adaptive",
+        type=float,
+        default=0,
+        help="quadtree refinement tolerance, h is the coarsest cell, 0 for off",
     )
     args = parser.parse_args()
 
     domain = [-1, 1, -1, 1]
 
+    # adaptive quadtree
+    if args.adaptive:
+        tree = Quadtree(domain, args.h, args.case)
+        u = tree.solve(tol=args.adaptive)
+
+        x, y = tree.coordinates(tree.nodes)
+        u_num = np.array([u[p] for p in tree.nodes])
+        max_error = np.max(np.abs(u_num - tree.solution(x, y)))
+        print(f"unknowns: {len(tree.unknowns)} max_error: {max_error:.3e}")
+
+        tree.plot_grid()
+        exit()
+
     # solver
     solver = Scheme(domain, args.h, args.case, bool(args.show_non_zero))
 
     X, Y = solver.X, solver.Y
-    u_num = solver.solve(args.scheme)
+    u_num = solver.solve(args.scheme, args.method, args.tol, workers=args.workers)
     u_ref = solver.solution(X, Y)
 
     # plot
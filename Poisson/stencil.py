@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# _*_ coding:utf-8 _*_
+#      "
+#    '':''
+#   ___:____      |\/|
+# ,'        `.    \  /
+# |  O        \___/  |
+# ~^~^~^~^~^~^~^~^~^~^
+
+"""
+Stencil kernels acting on the 2D field u[i, j] (boundary rows included).
+
+A stencil is the (offsets, weights) pair returned by Scheme.stencil, the
+first entry being the centre. Only interior nodes are touched, boundary
+values are Dirichlet data.
+"""
+
+import numpy as np
+from scipy.sparse.linalg import LinearOperator
+
+
+def shift(n: int, start: int, d: int, step=1) -> slice:
+    return slice(start + d, n - 1 + d, step)
+
+
+def apply(u: np.ndarray, offsets: list, weights: list) -> np.ndarray:
+    nx, ny = u.shape
+    Au = np.zeros((nx - 2, ny - 2))
+    for (di, dj), w in zip(offsets, weights):
+        Au += w * u[shift(nx, 1, di), shift(ny, 1, dj)]
+    return Au
+
+
+def residual(u: np.ndarray, b: np.ndarray, offsets: list, weights: list) -> np.ndarray:
+    r = np.zeros_like(u)
+    r[1:-1, 1:-1] = b[1:-1, 1:-1] - apply(u, offsets, weights)
+    return r
+
+
+def gauss_seidel(
+    u: np.ndarray, b: np.ndarray, offsets: list, weights: list, omega=1.0, reverse=False
+) -> np.ndarray:
+    """
+    one sweep of four-colour (i%2, j%2) Gauss-Seidel / SOR, nodes of the
+    same colour are decoupled for every 3x3 stencil
+    """
+    nx, ny = u.shape
+    colours = [(1, 1), (1, 2), (2, 1), (2, 2)]
+    for p, q in reversed(colours) if reverse else colours:
+        I, J = shift(nx, p, 0, 2), shift(ny, q, 0, 2)
+        s = b[I, J].copy()
+        for (di, dj), w in zip(offsets[1:], weights[1:]):
+            s -= w * u[shift(nx, p, di, 2), shift(ny, q, dj, 2)]
+        u[I, J] += omega * (s / weights[0] - u[I, J])
+    return u
+
+
+def jacobi(
+    u: np.ndarray, b: np.ndarray, offsets: list, weights: list, omega=1.0
+) -> np.ndarray:
+    u[1:-1, 1:-1] += omega * (b[1:-1, 1:-1] - apply(u, offsets, weights)) / weights[0]
+    return u
+
+
+def embed(v: np.ndarray, nx: int, ny: int) -> np.ndarray:
+    u = np.zeros((nx, ny))
+    u[1:-1, 1:-1] = v.reshape(nx - 2, ny - 2)
+    return u
+
+
+def operator(nx: int, ny: int, offsets: list, weights: list) -> LinearOperator:
+    """
+    the stencil on the (nx-2)*(ny-2) interior unknowns, zero Dirichlet data
+    """
+
+    def matvec(v):
+        return apply(embed(v, nx, ny), offsets, weights).ravel()
+
+    n = (nx - 2) * (ny - 2)
+    return LinearOperator((n, n), matvec=matvec, rmatvec=matvec, dtype=float)
+
+
+def ssor(nx: int, ny: int, offsets: list, weights: list, omega=1.0) -> LinearOperator:
+    """
+    symmetric four-colour SOR from a zero guess, an SPD preconditioner for CG
+    """
+
+    def matvec(r):
+        b = embed(r, nx, ny)
+        u = np.zeros((nx, ny))
+        gauss_seidel(u, b, offsets, weights, omega)
+        gauss_seidel(u, b, offsets, weights, omega, reverse=True)
+        return u[1:-1, 1:-1].ravel()
+
+    n = (nx - 2) * (ny - 2)
+    return LinearOperator((n, n), matvec=matvec, rmatvec=matvec, dtype=float)